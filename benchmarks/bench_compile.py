@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark of compile.py on a synthetic tree of pages.
+Times a clean build sequentially and with a process pool, then an incremental
+no-op rebuild, all in a temporary directory.
+
+Run from the repository root: python3 benchmarks/bench_compile.py --pages 3000 --jobs 4
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compile import ModularBlogCompiler
+
+CATEGORIES = ["games", "research", "travel", "simulation", "web-development", "llm"]
+
+
+def make_pages(pages_dir, count, seed):
+    """Write `count` synthetic pages (config.json + content.md with inline CSS/JS)"""
+    rng = random.Random(seed)
+    for index in range(count):
+        page_dir = pages_dir / f"post-{index:05d}"
+        page_dir.mkdir(parents=True)
+        config = {
+            "title": f"Synthetic post {index}",
+            "slug": f"post-{index:05d}",
+            "date": f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "description": "Generated page for compiler benchmarks",
+            "categories": rng.sample(CATEGORIES, 2)
+        }
+        (page_dir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+        
+        paragraphs = "\n".join(f"    <p>Paragraph {n} of post {index}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+                               for n in range(20))
+        content = (
+            "<style>\n" + "".join(f".block-{n} {{ margin: {n}px; padding: {n}px; }}\n" for n in range(60)) + "</style>\n"
+            f"<html>\n<body>\n  <h1>Post {index}</h1>\n{paragraphs}\n"
+            "  <script>\n" + "".join(f"  function handler{n}() {{ return {n}; }}\n" for n in range(60)) + "  </script>\n"
+            "</body>\n</html>\n"
+        )
+        (page_dir / "content.md").write_text(content, encoding="utf-8")
+
+
+def timed_build(pages_dir, output_dir, jobs, clean):
+    """Run one build with output silenced; returns (seconds, build_stats)"""
+    compiler = ModularBlogCompiler(pages_dir, output_dir, jobs=jobs)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiler.compile_all(clean=clean)
+    return time.perf_counter() - started, compiler.build_stats
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark compile.py on synthetic pages")
+    parser.add_argument("--pages", "-p", type=int, default=3000,
+                       help="Synthetic pages to generate (default: 3000)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                       help="Workers for the parallel build (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        pages_dir = Path(tmp) / "pages"
+        make_pages(pages_dir, args.pages, args.seed)
+        
+        print(f"Compiling {args.pages} synthetic pages")
+        print("-" * 58)
+        runs = [
+            ("clean build, --jobs 1", Path(tmp) / "out-seq", 1, True),
+            (f"clean build, --jobs {args.jobs}", Path(tmp) / "out-par", args.jobs, True),
+            (f"no-op rebuild, --jobs {args.jobs}", Path(tmp) / "out-par", args.jobs, False),
+        ]
+        for label, output_dir, jobs, clean in runs:
+            seconds, stats = timed_build(pages_dir, output_dir, jobs, clean)
+            print(f"{label:<32} {seconds:8.2f} s  "
+                  f"(compiled {len(stats['compiled'])}, skipped {len(stats['skipped'])})")
+        
+        sequential = (Path(tmp) / "out-seq" / "index.html").read_bytes()
+        parallel = (Path(tmp) / "out-par" / "index.html").read_bytes()
+        print(f"Homepages identical: {sequential == parallel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the NumPy pool-leaderboard analytics against the scalar ELO functions.
+Times the full player x player expected-score matrix and Monte Carlo simulations.
+
+Run from the repository root: python3 benchmarks/bench_pool_analytics.py
+"""
+
+import importlib.util
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def load_pool_api():
+    """Load pages/pool-leaderboard/api.py the same way flask_server does"""
+    spec = importlib.util.spec_from_file_location(
+        "pool_leaderboard_api", ROOT / "pages" / "pool-leaderboard" / "api.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench(label, func, number):
+    """Time `func` and print the per-call cost"""
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{label:<44} {seconds * 1e3:10.2f} ms")
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark pool-leaderboard analytics")
+    parser.add_argument("--players", "-p", type=int, default=200,
+                       help="Players in the expected-score matrix (default: 200)")
+    args = parser.parse_args()
+    
+    api = load_pool_api()
+    if api.np is None:
+        print("NumPy is not installed")
+        raise SystemExit(1)
+    
+    rng = random.Random(42)
+    ratings = [rng.randint(900, 1700) for _ in range(args.players)]
+    elo = api.PoolEloSystem
+    
+    print(f"Expected scores for {args.players}x{args.players} players")
+    print("-" * 58)
+    bench("scalar calculate_expected_score loop",
+          lambda: [[elo.calculate_expected_score(a, b) for b in ratings] for a in ratings], 3)
+    bench("expected_score_matrix", lambda: elo.expected_score_matrix(ratings), 20)
+    
+    players = {
+        f"player{index}": {"rating": rating, "games_played": rng.randint(0, 40)}
+        for index, rating in enumerate(ratings[:10])
+    }
+    print()
+    print("Monte Carlo simulation, 10 players")
+    print("-" * 58)
+    for runs, games in ((1000, 50), (2000, 50), (10000, 100), (10000, 500)):
+        bench(f"{runs} runs x {games} games",
+              lambda: api.simulate_ratings(players, games, runs, seed=1), 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for pool-leaderboard bulk game import.
+Generates synthetic games and times parsing + one-pass ELO replay + single write,
+against a throwaway data directory (the real data/ is never touched).
+
+Run from the repository root: python3 benchmarks/bench_pool_import.py --games 100000
+"""
+
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import shared.database as database
+
+
+def load_pool_api():
+    """Load pages/pool-leaderboard/api.py the same way flask_server does"""
+    spec = importlib.util.spec_from_file_location(
+        "pool_leaderboard_api", ROOT / "pages" / "pool-leaderboard" / "api.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_games(count, player_count, seed):
+    """Build JSON Lines text for `count` random games between `player_count` players"""
+    rng = random.Random(seed)
+    names = [f"player{index}" for index in range(player_count)]
+    start = datetime(2024, 1, 1)
+    margins = ["close", "comfortable", "decisive"]
+    
+    lines = []
+    for index in range(count):
+        winner, loser = rng.sample(names, 2)
+        played_at = start + timedelta(minutes=index * 7 + rng.randint(0, 6))
+        lines.append(json.dumps({
+            "winner": winner,
+            "loser": loser,
+            "margin": rng.choice(margins),
+            "timestamp": played_at.isoformat()
+        }))
+    rng.shuffle(lines)  # import must re-sort chronologically
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark pool-leaderboard bulk import")
+    parser.add_argument("--games", "-g", type=int, default=100000,
+                       help="Synthetic games to import (default: 100000)")
+    parser.add_argument("--players", "-p", type=int, default=50,
+                       help="Distinct players (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        database._db_instance = database.SimpleNoSQLDB(data_dir)
+        api = load_pool_api()
+        
+        text = synthetic_games(args.games, args.players, args.seed)
+        
+        started = time.perf_counter()
+        rows = api.parse_import_games(text, "jsonl")
+        parsed = time.perf_counter()
+        summary, errors = api.import_games(rows, create_missing=True)
+        finished = time.perf_counter()
+        
+        if errors:
+            print(f"Import rejected: {errors[:5]}")
+            raise SystemExit(1)
+        
+        total = finished - started
+        print(f"Imported {summary['games_imported']} games for {len(summary['players_created'])} players")
+        print("-" * 64)
+        print(f"{'parse':<24} {parsed - started:8.2f} s")
+        print(f"{'replay + write':<24} {finished - parsed:8.2f} s")
+        print(f"{'total':<24} {total:8.2f} s  ({summary['games_imported'] / total:,.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-event envelope cost in shared/websocket_utils.py.
+Measures building + JSON-serializing a stroke ack in full and light envelope modes,
+and the websocket_ack cost of a handler in the callback and fire-and-forget ack modes.
+
+Run from the repository root: python3 benchmarks/bench_websocket_envelopes.py
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.websocket_utils import (
+    websocket_success_response, websocket_error_handler, websocket_envelope, websocket_ack,
+    ENVELOPE_FULL, ENVELOPE_LIGHT, ACK_CALLBACK, ACK_NONE
+)
+
+ACK_DATA = {'stroke_id': '1735689600000_0.123456', 'total_strokes': 1234}
+
+
+@websocket_envelope(envelope=ENVELOPE_LIGHT, ack=ACK_CALLBACK)
+def callback_ack_handler():
+    return websocket_ack('stroke_acknowledged', ACK_DATA)
+
+
+@websocket_envelope(envelope=ENVELOPE_LIGHT, ack=ACK_NONE)
+def elided_ack_handler():
+    return websocket_ack('stroke_acknowledged', ACK_DATA)
+
+
+def serialize_ack(result):
+    """JSON-encode a handler's return value the way Socket.IO would for its callback"""
+    return json.dumps(result) if result is not None else None
+
+
+def bench(label, func, number):
+    """Time `func` and print the per-call cost and payload size"""
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    payload = func()
+    size = len(payload) if payload is not None else 0
+    print(f"{label:<34} {seconds / number * 1e6:8.2f} us/event  {size:4d} bytes")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket envelope serialization")
+    parser.add_argument("--number", "-n", type=int, default=100000,
+                       help="Events per timing run (default: 100000)")
+    args = parser.parse_args()
+
+    print(f"Envelope cost over {args.number} events (best of 5)")
+    print("-" * 64)
+    bench("success, full envelope",
+          lambda: json.dumps(websocket_success_response(ACK_DATA, envelope=ENVELOPE_FULL)), args.number)
+    bench("success, light envelope",
+          lambda: json.dumps(websocket_success_response(ACK_DATA, envelope=ENVELOPE_LIGHT)), args.number)
+    bench("error, full envelope",
+          lambda: json.dumps(websocket_error_handler("Stroke missing x", emit_to_sender=False,
+                                                     envelope=ENVELOPE_FULL)), args.number)
+    bench("error, light envelope",
+          lambda: json.dumps(websocket_error_handler("Stroke missing x", emit_to_sender=False,
+                                                     envelope=ENVELOPE_LIGHT)), args.number)
+    bench("ack via callback, light envelope",
+          lambda: serialize_ack(callback_ack_handler()), args.number)
+    bench("ack elided (fire-and-forget)",
+          lambda: serialize_ack(elided_ack_handler()), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,491 @@
 """
 Enhanced blog compiler that works with the new modular page structure.
 Supports per-page assets and the new config.json + content.md format.
+
+Builds are incremental: a manifest in the output directory records the input
+hashes and outputs of every page, so unchanged pages are skipped and outputs of
+removed pages are deleted. Use --clean for a full rebuild.
 """
 
 import os
+import re
+import gzip
 import json
+import hashlib
 import shutil
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+# Layouts live in templates/; a page may pick one with "layout" in config.json
+# or ship its own layout.html
+DEFAULT_LAYOUT = "base"
+PAGE_LAYOUT_NAME = "layout.html"
+
+# Homepage and category listings are split into chunks of this many posts
+SITE_TITLE = "Gabrielpenman.com"
+LISTING_PAGE_SIZE = 20
+JSON_INDEX_NAME = "index.json"
+
+# How many directory levels below pages/ a page may be (pages/main/sub1/sub2/sub3)
+MAX_PAGE_DEPTH = 4
+
+# Asset publishing: 'link' tries a hard link, then a reflink, then a copy;
+# 'reflink' skips hard links (outputs never share an inode with pages/)
+ASSET_MODES = ('link', 'reflink', 'copy')
+FICLONE = 0x40049409  # Linux ioctl: clone src_fd's extents into the target file
+
+# Assets are also published as name.<hash>.ext so they can be cached forever
+ASSETS_MANIFEST_NAME = "assets-manifest.json"
+FINGERPRINT_LENGTH = 8
+
+# Text outputs get .gz (and .br) siblings for servers to send as-is
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.json', '.svg')
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+MIN_COMPRESS_SIZE = 1024
+
+def file_sha256(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprint_name(relative_path, digest):
+    """js/main.js -> js/main.<first FINGERPRINT_LENGTH hex digits of digest>.js"""
+    path = Path(relative_path)
+    return path.with_name(f"{path.stem}.{digest[:FINGERPRINT_LENGTH]}{path.suffix}").as_posix()
+
+def write_if_changed(path, text):
+    """Write a text file unless it already has this content; returns True if written"""
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+def precompress_file(path):
+    """
+    Write path.gz, and path.br when brotli is installed, unless they are up to date.
+    Siblings carry the source's mtime, which is how freshness is checked here and by
+    the servers. Returns the suffixes written.
+    """
+    stat = path.stat()
+    if stat.st_size < MIN_COMPRESS_SIZE:
+        for suffix in COMPRESSED_SUFFIXES:
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+        return []
+    
+    encoders = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    
+    data = None
+    written = []
+    for suffix, encode in encoders:
+        target = path.with_name(path.name + suffix)
+        try:
+            if target.stat().st_mtime_ns == stat.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            data = path.read_bytes()
+        with open(target, 'wb') as f:
+            f.write(encode(data))
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written.append(suffix)
+    return written
+
+def reflink_file(src, dst):
+    """Copy-on-write clone of src to dst (btrfs, XFS); raises OSError if unsupported"""
+    import fcntl
+    
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def publish_asset(src, dst, digest=None, mode='link'):
+    """
+    Publish one asset file, doing as little I/O as possible.
+    Returns 'skipped' when dst already matches src (same inode, or same size,
+    mtime and hash), otherwise 'linked', 'reflinked' or 'copied'.
+    """
+    src_stat = src.stat()
+    try:
+        dst_stat = dst.stat()
+    except FileNotFoundError:
+        dst_stat = None
+    
+    if dst_stat is not None:
+        if (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+            return 'skipped'
+        if (dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+                and file_sha256(dst) == (digest or file_sha256(src))):
+            return 'skipped'
+        dst.unlink()
+    
+    # Hard links and reflinks only work within one filesystem; EXDEV, EPERM or
+    # EOPNOTSUPP fall through to the next strategy
+    if mode == 'link':
+        try:
+            os.link(src, dst)
+            return 'linked'
+        except OSError:
+            pass
+    if mode in ('link', 'reflink') and src_stat.st_dev == dst.parent.stat().st_dev:
+        try:
+            reflink_file(src, dst)
+            return 'reflinked'
+        except (OSError, ImportError):
+            pass
+    shutil.copy2(src, dst)
+    return 'copied'
+
+# Minification (--minify) is deliberately conservative: it strips comments and
+# collapses whitespace, but never renames, reorders, or joins lines JavaScript
+# might rely on for automatic semicolon insertion
+HTML_RAW_BLOCK = re.compile(r'(<!--.*?-->|<(script|style|pre|textarea)\b[^>]*>.*?</\2\s*>)', re.S | re.I)
+HTML_TAG = re.compile(r'''(<(?:"[^"]*"|'[^']*'|[^'">])*>)''')
+PRESERVES_SPACES = re.compile(r'''white-space\s*:\s*(?:pre|pre-wrap|break-spaces)\s*[;}!"']''', re.I)
+JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                     'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+def _css_pieces(css):
+    """Split CSS into ('code', text) and ('literal', text) pieces, dropping comments"""
+    pieces = []
+    code = []
+    i = start = 0
+    while i < len(css):
+        c = css[i]
+        if css.startswith('/*', i):
+            code.append(css[start:i] + ' ')
+            end = css.find('*/', i + 2)
+            i = start = len(css) if end == -1 else end + 2
+        elif c in '"\'':
+            pieces.append(('code', ''.join(code) + css[start:i]))
+            code.clear()
+            j = i + 1
+            while j < len(css) and css[j] != c and css[j] != '\n':
+                j += 2 if css[j] == '\\' else 1
+            pieces.append(('literal', css[i:j + 1]))
+            i = start = j + 1
+        else:
+            i += 1
+    pieces.append(('code', ''.join(code) + css[start:]))
+    return pieces
+
+def minify_css(css):
+    """Strip comments and collapse whitespace around CSS punctuation"""
+    out = []
+    for kind, text in _css_pieces(css):
+        if kind == 'code':
+            text = re.sub(r'\s+', ' ', text)
+            text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+            text = re.sub(r':\s+', ':', text)
+            text = text.replace(';}', '}')
+        out.append(text)
+    return ''.join(out).strip()
+
+def _js_regex_allowed(code):
+    """Whether a '/' after this code starts a regex literal rather than a division"""
+    stripped = code.rstrip()
+    if not stripped:
+        return True
+    if stripped[-1] in ')]' or stripped[-1] in '"\'`':
+        return False
+    if stripped[-1].isalnum() or stripped[-1] in '_$':
+        word = re.search(r'[\w$]+$', stripped).group()
+        return word in JS_REGEX_KEYWORDS
+    return True
+
+def _js_pieces(js):
+    """Split JavaScript into ('code', text) and ('literal', text) pieces, dropping comments"""
+    pieces = []
+    code = []
+    braces = []  # 'code' for { ... }, 'template' for ${ ... } inside a template literal
+    i = 0
+    
+    def literal(end):
+        pieces.append(('code', ''.join(code)))
+        pieces.append(('literal', js[i:end]))
+        code.clear()
+        return end
+    
+    while i < len(js):
+        c = js[i]
+        if c == '`' or (c == '}' and braces and braces[-1] == 'template'):
+            if c == '}':
+                braces.pop()
+            j = i + 1
+            while j < len(js):
+                if js[j] == '\\':
+                    j += 2
+                elif js[j] == '`':
+                    j += 1
+                    break
+                elif js.startswith('${', j):
+                    j += 2
+                    braces.append('template')
+                    break
+                else:
+                    j += 1
+            i = literal(j)
+        elif c in '"\'':
+            j = i + 1
+            while j < len(js) and js[j] != c and js[j] != '\n':
+                j += 2 if js[j] == '\\' else 1
+            i = literal(j + 1)
+        elif js.startswith('//', i):
+            end = js.find('\n', i)
+            i = len(js) if end == -1 else end
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            end = len(js) if end == -1 else end + 2
+            code.append('\n' if '\n' in js[i:end] else ' ')
+            i = end
+        elif c == '/' and _js_regex_allowed((pieces[-1][1][-20:] if pieces else '') + ''.join(code[-40:])):
+            j, in_class = i + 1, False
+            while j < len(js) and js[j] != '\n':
+                if js[j] == '\\':
+                    j += 1
+                elif js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                elif js[j] == '/' and not in_class:
+                    break
+                j += 1
+            if j >= len(js) or js[j] != '/':
+                code.append(c)  # not a regex after all
+                i += 1
+                continue
+            j += 1
+            while j < len(js) and (js[j].isalnum() or js[j] == '_'):
+                j += 1
+            i = literal(j)
+        else:
+            if c == '{':
+                braces.append('code')
+            elif c == '}' and braces:
+                braces.pop()
+            code.append(c)
+            i += 1
+    pieces.append(('code', ''.join(code)))
+    return pieces
+
+def minify_js(js):
+    """Strip comments, indentation and blank lines, keeping line breaks between statements"""
+    out = []
+    for kind, text in _js_pieces(js):
+        if kind == 'code':
+            text = re.sub(r'[ \t]*\n\s*', '\n', text)
+            text = re.sub(r'[ \t]+', ' ', text)
+            text = re.sub(r'([;{,])\n', r'\1', text)
+        out.append(text)
+    return ''.join(out).strip()
+
+def _minify_html_text(text, keep_spaces):
+    """Drop indentation around line breaks; HTML renders the rest of the whitespace as one space"""
+    if keep_spaces:
+        return text
+    pieces = HTML_TAG.split(text)
+    for index in range(0, len(pieces), 2):
+        pieces[index] = re.sub(r'[ \t]*\n[ \t]*', '\n', pieces[index])
+        pieces[index] = re.sub(r'[ \t]{2,}', ' ', pieces[index])
+    return ''.join(pieces)
+
+def minify_html(html):
+    """
+    Minify an HTML document: comments are dropped, <style> and JavaScript <script>
+    blocks are minified, and <pre>/<textarea> contents are left untouched.
+    Pages whose CSS uses white-space: pre keep their text spacing.
+    """
+    keep_spaces = bool(PRESERVES_SPACES.search(html))
+    out = []
+    pos = 0
+    for match in HTML_RAW_BLOCK.finditer(html):
+        out.append(_minify_html_text(html[pos:match.start()], keep_spaces))
+        block = match.group(1)
+        tag = (match.group(2) or '').lower()
+        if block.startswith('<!--'):
+            if block.startswith('<!--[if'):
+                out.append(block)
+        elif tag in ('style', 'script'):
+            open_end = block.index('>') + 1
+            close_start = block.lower().rindex('</')
+            opening, body = block[:open_end], block[open_end:close_start]
+            script_type = re.search(r'''\btype\s*=\s*["']?([^"'\s>]*)''', opening, re.I)
+            if tag == 'style':
+                body = minify_css(body)
+            elif (script_type.group(1).lower() if script_type else '') in JS_TYPES:
+                body = minify_js(body)
+            out.append(opening + body + block[close_start:])
+        else:
+            out.append(block)
+        pos = match.end()
+    out.append(_minify_html_text(html[pos:], keep_spaces))
+    return ''.join(out).strip()
+
+class Template:
+    """
+    A layout compiled once into literal text and {{ name }} slots, so rendering
+    is a single join. As with Jinja, one trailing newline in the file is dropped.
+    """
+    SLOT = re.compile(r'\{\{\s*([A-Za-z_]\w*)\s*\}\}')
+    
+    def __init__(self, text, name='<string>'):
+        if text.endswith('\n'):
+            text = text[:-1]
+        parts = self.SLOT.split(text)
+        self.name = name
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+    
+    def render(self, **values):
+        out = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            if slot not in values:
+                raise ValueError(f"Template {self.name} uses unknown variable '{slot}'")
+            out.append(str(values[slot]))
+            out.append(literal)
+        return ''.join(out)
+
+_template_cache = {}
+
+def load_template(path):
+    """Compile a template file, reusing the compiled form until the file changes"""
+    path = Path(path)
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, Template(path.read_text(encoding='utf-8'), str(path)))
+        _template_cache[path] = cached
+    return cached[1]
+
+def category_slug(name):
+    """URL-safe name for a category's listing directory"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'uncategorized'
+
+def listing_path(base, number):
+    """Output path of page `number` (1-based) of a listing rooted at `base` ('' or 'category/x/')"""
+    return f"{base}index.html" if number == 1 else f"{base}page/{number}/index.html"
+
+def listing_url(base, number):
+    """URL of page `number` of a listing rooted at `base`"""
+    return f"/{base}" if number == 1 else f"/{base}page/{number}"
+
+def list_asset_files(assets_dir):
+    """Every file under a page's assets directory, sorted"""
+    files = []
+    for root, dirs, names in os.walk(assets_dir):
+        files.extend(Path(root) / name for name in names)
+    return sorted(files)
+
+def build_page_job(args):
+    """Process-pool entry point: build one page, returning (entry, status, error)"""
+    page_dir, previous, assets_dir, options = args
+    compiler = ModularBlogCompiler(**options)
+    try:
+        entry, status = compiler.build_page(Path(page_dir), previous, Path(assets_dir) if assets_dir else None)
+        return entry, status, None
+    except Exception as e:
+        return None, 'error', str(e)
+
+class PageIndex:
+    """
+    One walk of the pages directory: page directories (sorted by their path
+    relative to the root, which is also their manifest key), each page's
+    assets directory, and top-level directories that contain no page.
+    """
+    
+    def __init__(self, root, max_depth=MAX_PAGE_DEPTH):
+        self.root = Path(root)
+        self.max_depth = max_depth
+        self.pages = []
+        self.keys = []
+        self.asset_dirs = {}
+        self.skipped = []
+        if self.root.is_dir():
+            self._scan()
+    
+    def _scan(self):
+        found = []
+        
+        def walk(directory, depth):
+            """Scan one directory, recursing into subdirectories; returns True if it holds a page"""
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                return False
+            names = {entry.name for entry in entries if entry.is_file()}
+            is_page = depth > 0 and 'config.json' in names and 'content.md' in names
+            if is_page:
+                found.append(directory)
+            
+            has_page = is_page
+            for entry in entries:
+                if not entry.is_dir() or entry.name == '__pycache__' or entry.name.startswith('.'):
+                    continue
+                if is_page and entry.name == 'assets':
+                    self.asset_dirs[Path(directory)] = Path(entry.path)
+                    continue
+                if depth < self.max_depth:
+                    child_has_page = walk(entry.path, depth + 1)
+                    has_page = has_page or child_has_page
+                    if depth == 0 and not child_has_page:
+                        self.skipped.append(entry.name)
+            return has_page
+        
+        walk(str(self.root), 0)
+        
+        keys = sorted((Path(path).relative_to(self.root).as_posix(), path) for path in found)
+        self.keys = [key for key, _ in keys]
+        self.pages = [Path(path) for _, path in keys]
+        self.skipped.sort()
+    
+    def __len__(self):
+        return len(self.pages)
+    
+    def __iter__(self):
+        return iter(self.pages)
+
 class ModularBlogCompiler:
-    def __init__(self, pages_dir="pages", output_dir="output"):
+    def __init__(self, pages_dir="pages", output_dir="output", jobs=1, asset_mode='link', compress=True, 
+                 minify=False, max_depth=MAX_PAGE_DEPTH, templates_dir="templates", 
+                 page_size=LISTING_PAGE_SIZE):
         self.pages_dir = Path(pages_dir)
         self.output_dir = Path(output_dir)
         self.categories = {}
+        self.manifest_file = self.output_dir / MANIFEST_NAME
+        self.manifest = {}
+        self.build_stats = {'compiled': [], 'skipped': [], 'removed': [], 'failed': []}
+        self.jobs = jobs
+        self.asset_mode = asset_mode
+        self.compress = compress
+        self.minify = minify
+        self.max_depth = max_depth
+        self.templates_dir = Path(templates_dir)
+        self.page_size = max(1, page_size)
         
     def clean_output(self):
         """Clean the output directory"""
@@ -24,45 +497,119 @@ class ModularBlogCompiler:
         # Create assets directory in output
         (self.output_dir / "assets").mkdir(exist_ok=True)
     
-    def get_page_directories(self):
-        """Get all valid page directories (including nested subpages)"""
-        if not self.pages_dir.exists():
-            return []
-        
-        page_dirs = []
+    def load_manifest(self):
+        """
+        Load the previous build's pages and whether they can be reused to skip pages.
+        A manifest from another compiler or --minify setting still lists the outputs
+        to clean up, it just can't skip anything; a missing one gives ({}, False).
+        """
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            self.manifest = {}
+            return {}, False
         
-        def find_pages_recursive(directory, depth=0):
-            """Recursively find all page directories"""
-            # Limit depth to prevent infinite recursion
-            if depth > 3:  # Allow up to 3 levels deep: pages/main/sub1/sub2
-                return
-                
-            for item in directory.iterdir():
-                if item.is_dir():
-                    config_file = item / 'config.json'
-                    content_file = item / 'content.md'
-                    
-                    if config_file.exists() and content_file.exists():
-                        page_dirs.append(item)
-                    
-                    # Always check subdirectories regardless of whether this directory is a page
-                    find_pages_recursive(item, depth + 1)
-        
-        find_pages_recursive(self.pages_dir)
-        
-        # Warn about skipped directories only for top-level directories
-        for item in self.pages_dir.iterdir():
-            if item.is_dir():
-                config_file = item / 'config.json'
-                content_file = item / 'content.md'
-                
-                if not config_file.exists() or not content_file.exists():
-                    # Check if this directory contains any valid subpages
-                    has_subpages = any(p for p in page_dirs if str(p).startswith(str(item)))
-                    if not has_subpages:
-                        print(f"Warning: Skipping {item.name} - missing config.json or content.md")
+        # Listing outputs are tracked even when the pages must be rebuilt
+        self.manifest = manifest
+        reusable = (manifest.get('version') == MANIFEST_VERSION
+                    and manifest.get('compiler') == self.compiler_hash()
+                    and manifest.get('minify', False) == self.minify)
+        return manifest.get('pages', {}), reusable
+    
+    def save_manifest(self, pages, listings=()):
+        """Write the manifest for the build that just finished"""
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'compiler': self.compiler_hash(),
+            'minify': self.minify,
+            'pages': pages,
+            'listings': sorted(listings)
+        }
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    def compiler_hash(self):
+        """Hash of this compiler's source and templates, so changing either rebuilds everything"""
+        digest = hashlib.sha256(file_sha256(Path(__file__)).encode())
+        if self.templates_dir.is_dir():
+            for path in sorted(self.templates_dir.rglob('*.html')):
+                digest.update(f"{path.relative_to(self.templates_dir).as_posix()}:{file_sha256(path)}".encode())
+        return digest.hexdigest()
+    
+    def template(self, name):
+        """A site template by name, e.g. 'base' or 'partials/post'"""
+        return load_template(self.templates_dir / f"{name}.html")
+    
+    def page_layout(self, page_dir, config):
+        """The page's own layout.html, else the layout named in config.json, else the base layout"""
+        own_layout = page_dir / PAGE_LAYOUT_NAME
+        if own_layout.exists():
+            return load_template(own_layout)
+        return self.template(config.get('layout', DEFAULT_LAYOUT))
+    
+    def hash_page_inputs(self, page_dir, previous=None, assets_dir=None):
+        """
+        Hash a page's config.json, content.md, layout.html and the files in
+        `assets_dir` (from the PageIndex; None if the page has no assets).
+        Files whose size and mtime match the previous build reuse its hash.
+        """
+        previous = previous or {}
+        files = [page_dir / 'config.json', page_dir / 'content.md']
+        if (page_dir / PAGE_LAYOUT_NAME).exists():
+            files.append(page_dir / PAGE_LAYOUT_NAME)
+        if assets_dir is not None:
+            files.extend(list_asset_files(assets_dir))
         
-        return page_dirs
+        inputs = {}
+        for path in files:
+            key = path.relative_to(page_dir).as_posix()
+            stat = path.stat()
+            old = previous.get(key)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                digest = old['sha256']
+            else:
+                digest = file_sha256(path)
+            inputs[key] = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        return inputs
+    
+    def page_outputs(self, slug, assets):
+        """Output paths (relative to output_dir) written for a page, given its asset -> fingerprinted names"""
+        if '/' in slug:
+            outputs = [f"{slug}/index.html", f"{slug.replace('/', '-')}.html"]
+        else:
+            outputs = [f"{slug}/index.html"]
+        for asset, fingerprinted in assets.items():
+            outputs.append(f"assets/{slug}/{asset}")
+            outputs.append(f"assets/{slug}/{fingerprinted}")
+        return outputs
+    
+    def remove_outputs(self, outputs):
+        """Delete output files and any directories left empty"""
+        for output in outputs:
+            path = self.output_dir / output
+            if path.is_file():
+                path.unlink()
+            for suffix in COMPRESSED_SUFFIXES:
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+            parent = path.parent
+            while parent != self.output_dir and parent.exists() and not any(parent.iterdir()):
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break  # another page (or worker) is writing into it
+                parent = parent.parent
+    
+    def scan_pages(self):
+        """Index pages_dir in one pass, warning about top-level directories without pages"""
+        index = PageIndex(self.pages_dir, self.max_depth)
+        for name in index.skipped:
+            print(f"Warning: Skipping {name} - missing config.json or content.md")
+        return index
+    
+    def get_page_directories(self):
+        """Get all valid page directories (including nested subpages)"""
+        return self.scan_pages().pages
     
     def parse_page_config(self, page_dir):
         """Parse a page's config.json file"""
@@ -105,38 +652,61 @@ class ModularBlogCompiler:
         except IOError as e:
             raise ValueError(f"Error reading content.md in {page_dir.name}: {e}")
     
-    def copy_page_assets(self, page_dir, slug):
-        """Copy page assets to output directory"""
-        assets_dir = page_dir / 'assets'
-        
-        if not assets_dir.exists():
-            return []
+    def copy_page_assets(self, page_dir, slug, hashes=None, assets_dir=None):
+        """
+        Publish the files in `assets_dir` to the output directory, under both their own
+        and fingerprinted names. `hashes` maps 'assets/...' paths to SHA-256 digests
+        from hash_page_inputs, and also serves as the file list when given.
+        Returns {asset path: fingerprinted path}, relative to the page's output assets directory.
+        """
+        if assets_dir is None:
+            return {}
         
         # Create page-specific assets directory in output
         output_assets_dir = self.output_dir / "assets" / slug
         output_assets_dir.mkdir(parents=True, exist_ok=True)
         
-        copied_assets = []
+        hashes = hashes or {}
+        copied_assets = {}
+        actions = {}
         
-        # Copy all files from page assets to output assets
-        for asset_file in assets_dir.rglob('*'):
-            if asset_file.is_file():
-                # Preserve directory structure
-                relative_path = asset_file.relative_to(assets_dir)
-                output_asset_path = output_assets_dir / relative_path
-                
-                # Create parent directories if needed
-                output_asset_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                try:
-                    shutil.copy2(asset_file, output_asset_path)
-                    copied_assets.append(str(relative_path))
-                except IOError as e:
-                    print(f"Warning: Could not copy asset {asset_file}: {e}")
+        # Publish all files from page assets to output assets
+        if hashes:
+            asset_files = [assets_dir / key[len('assets/'):] for key in sorted(hashes) if key.startswith('assets/')]
+        else:
+            asset_files = list_asset_files(assets_dir)
+        for asset_file in asset_files:
+            # Preserve directory structure
+            relative_path = asset_file.relative_to(assets_dir)
+            output_asset_path = output_assets_dir / relative_path
+            
+            # Create parent directories if needed
+            output_asset_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            try:
+                digest = hashes.get(f"assets/{relative_path.as_posix()}") or file_sha256(asset_file)
+                fingerprinted = fingerprint_name(relative_path, digest)
+                for target in (output_asset_path, output_assets_dir / fingerprinted):
+                    action = publish_asset(asset_file, target, digest, self.asset_mode)
+                    actions[action] = actions.get(action, 0) + 1
+                copied_assets[relative_path.as_posix()] = fingerprinted
+            except (IOError, OSError) as e:
+                print(f"Warning: Could not copy asset {asset_file}: {e}")
+        
+        if actions:
+            summary = ', '.join(f"{count} {action}" for action, count in sorted(actions.items()))
+            print(f"  Published {len(copied_assets)} assets for {slug} ({summary})")
         
         return copied_assets
     
-    def compile_page(self, page_dir):
+    def fingerprint_asset_urls(self, html, slug, assets):
+        """Point /assets/<slug>/... references in compiled HTML at the fingerprinted files"""
+        if not assets:
+            return html
+        pattern = re.compile(r"""(?<=["'(=\s])(/?assets/""" + re.escape(slug) + r"""/)([^"'()\s?#]+)""")
+        return pattern.sub(lambda m: m.group(1) + assets.get(m.group(2), m.group(2)), html)
+    
+    def compile_page(self, page_dir, hashes=None, assets_dir=None):
         """Compile a single page from the modular structure"""
         config = self.parse_page_config(page_dir)
         html_content, css_content = self.parse_page_content(page_dir)
@@ -148,24 +718,22 @@ class ModularBlogCompiler:
         # Use slug from config, or fall back to the full relative path
         slug = config.get('slug', url_path)
         
-        # Copy page assets
-        assets = self.copy_page_assets(page_dir, slug)
-        if assets:
-            print(f"  Copied {len(assets)} assets for {slug}")
+        # Publish page assets
+        assets = self.copy_page_assets(page_dir, slug, hashes, assets_dir)
         
         # Create full HTML document
-        full_html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{config.get('title', 'Blog Post')}</title>
-    {css_content}
-</head>
-<body>
-    {html_content}
-</body>
-</html>"""
+        full_html = self.page_layout(page_dir, config).render(
+            title=config.get('title', 'Blog Post'),
+            head=css_content,
+            body=html_content,
+            slug=slug,
+            date=config.get('date', ''),
+            description=config.get('description', ''),
+            categories=', '.join(config.get('categories', []))
+        )
+        full_html = self.fingerprint_asset_urls(full_html, slug, assets)
+        if self.minify:
+            full_html = self.minify_page(full_html, slug)
         
         # Create nested directory structure for subpages
         if '/' in slug:
@@ -196,43 +764,140 @@ class ModularBlogCompiler:
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(full_html)
         
-        # Track categories - but exclude subpages from homepage listing
+        return config, slug, assets
+    
+    def minify_page(self, html, name):
+        """Minify a compiled page, printing its size before and after"""
+        minified = minify_html(html)
+        before, after = len(html.encode('utf-8')), len(minified.encode('utf-8'))
+        saved = 100 * (before - after) / before if before else 0
+        print(f"  Minified {name}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB (-{saved:.0f}%)")
+        return minified
+    
+    def track_categories(self, page):
+        """Record a page under its categories - subpages are excluded from the homepage listing"""
         # Only include top-level pages (no '/' in slug) in the homepage
-        is_top_level = '/' not in slug
-        if is_top_level:
-            categories = config.get('categories', [])
-            for category in categories:
-                if category not in self.categories:
-                    self.categories[category] = []
-                self.categories[category].append({
-                    'title': config.get('title', 'Untitled'),
-                    'slug': slug,
-                    'date': config.get('date', ''),
-                    'description': config.get('description', ''),
-                    'assets': assets
-                })
+        if '/' in page['slug']:
+            return
+        for category in page['categories']:
+            if category not in self.categories:
+                self.categories[category] = []
+            self.categories[category].append({
+                'title': page['title'],
+                'slug': page['slug'],
+                'date': page['date'],
+                'description': page['description'],
+                'assets': page['assets']
+            })
+    
+    def build_page(self, page_dir, previous, assets_dir=None):
+        """
+        Compile a page unless its inputs match the previous build's manifest entry.
+        Returns the page's new manifest entry and 'compiled' or 'skipped'.
+        """
+        inputs = self.hash_page_inputs(page_dir, previous.get('inputs') if previous else None, assets_dir)
         
-        return config, slug, assets
+        # Only content counts: a touched but unchanged file skips the page, and the
+        # entry takes its new stat data so it is not re-hashed next time
+        digests = {key: item['sha256'] for key, item in inputs.items()}
+        if previous and digests == {key: item['sha256'] for key, item in previous['inputs'].items()} and all(
+            (self.output_dir / output).exists() for output in previous['outputs']
+        ):
+            return dict(previous, inputs=inputs), 'skipped'
+        
+        config, slug, assets = self.compile_page(page_dir, digests, assets_dir)
+        page = {
+            'title': config.get('title', 'Untitled'),
+            'slug': slug,
+            'date': config.get('date', ''),
+            'description': config.get('description', ''),
+            'categories': config.get('categories', []),
+            'assets': list(assets)
+        }
+        outputs = self.page_outputs(slug, assets)
+        return {'inputs': inputs, 'outputs': outputs, 'page': page, 'assets': assets}, 'compiled'
     
-    def generate_homepage(self):
-        """Generate homepage by compiling all pages first"""
+    def build_pages(self, jobs_list):
+        """
+        Build (page_dir, previous entry, assets dir) jobs, in a process pool when self.jobs > 1.
+        Results come back in input order: (entry, status, error).
+        """
+        options = {
+            'pages_dir': str(self.pages_dir),
+            'output_dir': str(self.output_dir),
+            'asset_mode': self.asset_mode,
+            'minify': self.minify,
+            'templates_dir': str(self.templates_dir)
+        }
+        args = [(str(page_dir), previous, str(assets_dir) if assets_dir else None, options)
+                for page_dir, previous, assets_dir in jobs_list]
+        
+        if self.jobs <= 1 or len(args) <= 1:
+            return [build_page_job(arg) for arg in args]
+        
+        workers = min(self.jobs, len(args))
+        chunksize = max(1, len(args) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(build_page_job, args, chunksize=chunksize))
+    
+    def generate_homepage(self, dirty=None):
+        """
+        Generate homepage by compiling all changed pages first.
+        `dirty` (page paths relative to pages_dir) limits checking to those pages;
+        the others reuse their previous build without being hashed.
+        """
         pages_list = []
+        previous_pages, reusable = self.load_manifest()
+        # Entries only skip pages when the last build used this compiler and options
+        reuse = previous_pages if reusable else {}
+        manifest_pages = {}
+        self.categories = {}
+        self.build_stats = {key: [] for key in self.build_stats}
         
-        # Compile all pages and collect metadata
-        for page_dir in self.get_page_directories():
-            try:
-                config, slug, assets = self.compile_page(page_dir)
-                pages_list.append({
-                    'title': config.get('title', 'Untitled'),
-                    'slug': slug,
-                    'date': config.get('date', ''),
-                    'description': config.get('description', ''),
-                    'categories': config.get('categories', []),
-                    'assets': assets
-                })
-                print(f"Compiled page: {page_dir.name}")
-            except Exception as e:
-                print(f"Error compiling {page_dir.name}: {e}")
+        # Sorted so the build (and homepage ties) don't depend on directory order
+        index = self.scan_pages()
+        page_dirs, keys = index.pages, index.keys
+        
+        build = [
+            (page_dir, reuse.get(key), index.asset_dirs.get(page_dir))
+            for page_dir, key in zip(page_dirs, keys)
+            if dirty is None or key in dirty or key not in reuse
+        ]
+        built = iter(self.build_pages(build))
+        results = [
+            next(built) if dirty is None or key in dirty or key not in reuse
+            else (reuse[key], 'skipped', None)
+            for key in keys
+        ]
+        
+        # Merge results in page order, collecting metadata for all pages
+        for page_dir, key, (entry, status, error) in zip(page_dirs, keys, results):
+            if error is not None:
+                print(f"Error compiling {page_dir.name}: {error}")
+                self.build_stats['failed'].append(key)
+                # Keep the last good build; changed inputs are retried next time
+                entry = previous_pages.get(key)
+                if entry is None:
+                    continue
+            else:
+                if status == 'compiled':
+                    print(f"Compiled page: {page_dir.name}")
+                self.build_stats[status].append(entry['page']['slug'])
+            manifest_pages[key] = entry
+            pages_list.append(entry['page'])
+            self.track_categories(entry['page'])
+        
+        # Delete outputs no page produces any more: removed pages, renamed slugs,
+        # deleted assets. Checked against the previous manifest even when it could
+        # not be reused, or a full rebuild would orphan them.
+        current_outputs = set()
+        for entry in manifest_pages.values():
+            current_outputs.update(entry['outputs'])
+        for key, entry in sorted(previous_pages.items()):
+            self.remove_outputs(sorted(set(entry['outputs']) - current_outputs))
+            if key not in manifest_pages:
+                self.build_stats['removed'].append(entry['page']['slug'])
+                print(f"Removed page: {key}")
         
         # Organize pages hierarchically
         top_level_pages = []
@@ -257,191 +922,211 @@ class ModularBlogCompiler:
         for parent in subpages_map:
             subpages_map[parent].sort(key=lambda x: x['title'])
         
-        # Generate homepage HTML with nested structure
-        homepage_html = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Gabrielpenman.com</title>
-    <style>
-    body {
-        max-width: 1000px;
-        margin: 0 auto;
-        padding: 20px;
-        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-    }
-    
-    .subpages {
-        margin-left: 20px;
-        margin-top: 10px;
-        border-left: 2px solid #e1e8ed;
-        padding-left: 15px;
-    }
-    
-    .subpage-item {
-        margin: 8px 0;
-        font-size: 0.9em;
-    }
-    
-    .subpage-item a {
-        color: #0066cc;
-        text-decoration: none;
-        display: flex;
-        align-items: center;
-        gap: 8px;
-    }
-    
-    .subpage-item a:hover {
-        text-decoration: underline;
-    }
-    
-    .subpage-item a:visited {
-        color: #551a8b;
-    }
-    
-    .subpage-toggle {
-        cursor: pointer;
-        background: none;
-        border: none;
-        color: #666;
-        font-size: 0.9em;
-        margin-top: 8px;
-        padding: 4px 8px;
-        border-radius: 3px;
-        background: #f8f9fa;
-    }
-    
-    .subpage-toggle:hover {
-        background: #e9ecef;
-    }
-    
-    .subpages.collapsed {
-        display: none;
-    }
-    
-    article {
-        margin-bottom: 30px;
-        padding-bottom: 20px;
-        border-bottom: 1px solid #eee;
-    }
-    
-    article:last-child {
-        border-bottom: none;
-    }
-    
-    .date {
-        color: #666;
-        font-size: 0.9em;
-        margin: 5px 0;
-    }
-    
-    .description {
-        margin: 8px 0;
-        color: #333;
-    }
-    
-    .categories {
-        font-size: 0.85em;
-        color: #888;
-    }
-    
-    .assets-info {
-        font-size: 0.8em;
-        color: #999;
-        margin-top: 5px;
-    }
-    </style>
-    <script>
-    function toggleSubpages(parentSlug) {
-        const subpages = document.getElementById('subpages-' + parentSlug);
-        const button = document.getElementById('toggle-' + parentSlug);
-        
-        if (subpages.classList.contains('collapsed')) {
-            subpages.classList.remove('collapsed');
-            button.textContent = 'Hide subpages ▲';
-        } else {
-            subpages.classList.add('collapsed');
-            button.textContent = 'Show subpages ▼';
-        }
-    }
-    </script>
-</head>
-<body>
-    <h1>Gabrielpenman.com</h1>
-    <div class="posts">
-"""
+        # Paginated homepage, per-category listings and the JSON index
+        listings = self.write_listings(top_level_pages, subpages_map)
+        stale = set(self.manifest.get('listings', [])) - set(listings)
+        self.remove_outputs(sorted(stale))
         
-        for page in top_level_pages:
-            asset_info = ""
-            if page['assets']:
-                asset_info = f"<div class=\"assets-info\">{len(page['assets'])} assets included</div>"
-            
-            subpages = subpages_map.get(page['slug'], [])
-            
-            homepage_html += f"""        <article>
-            <h2><a href="{page['slug']}">{page['title']}</a></h2>
-            <div class="date">{page['date']}</div>
-            <div class="description">{page['description']}</div>
-            <div class="categories">Categories: {', '.join(page['categories'])}</div>
-            {asset_info}"""
+        self.save_manifest(manifest_pages, listings)
+        self.write_assets_manifest(manifest_pages)
+        
+        if self.compress:
+            outputs = listings + [ASSETS_MANIFEST_NAME]
+            for entry in manifest_pages.values():
+                outputs.extend(entry['outputs'])
+            self.compress_outputs(outputs)
+    
+    def render_post(self, page, subpages):
+        """Homepage/category summary of a top-level page, with links to its subpages"""
+        asset_info = ""
+        if page['assets']:
+            asset_info = self.template('partials/assets-info').render(count=len(page['assets']))
+        
+        subpages_html = ""
+        if subpages:
+            # Show subpages, with collapse if more than 5
+            should_collapse = len(subpages) > 5
+            subpage_template = self.template('partials/subpage')
+            items = []
             
-            if subpages:
-                # Show subpages, with collapse if more than 5
-                should_collapse = len(subpages) > 5
-                collapse_class = " collapsed" if should_collapse else ""
-                
-                if should_collapse:
-                    homepage_html += f"""
-            <button class="subpage-toggle" id="toggle-{page['slug']}" onclick="toggleSubpages('{page['slug']}')">Show subpages ▼</button>"""
-                
-                homepage_html += f"""
-            <div class="subpages{collapse_class}" id="subpages-{page['slug']}">"""
-                
-                for subpage in subpages:
-                    # Create a clean subpage title
-                    subpage_title = subpage['title']
-                    
-                    # Remove parent title prefix if it exists
-                    if page['title'] in subpage_title:
-                        subpage_title = subpage_title.replace(page['title'], '').strip(' -')
-                    
-                    # If title is empty or too similar, use the path name
-                    if not subpage_title or subpage_title.lower() == page['title'].lower():
-                        path_name = subpage['slug'].split('/')[-1]
-                        subpage_title = path_name.replace('-', ' ').title()
-                    
-                    homepage_html += f"""
-                <div class="subpage-item">
-                    <a href="{subpage['slug']}">
-                        <span>→</span>
-                        <span>{subpage_title}</span>
-                    </a>
-                </div>"""
-                
-                homepage_html += """
-            </div>"""
+            for subpage in subpages:
+                items.append(subpage_template.render(slug=subpage['slug'],
+                                                     title=self.subpage_title(page, subpage)))
             
-            homepage_html += """
-        </article>
-"""
+            toggle = ""
+            if should_collapse:
+                toggle = self.template('partials/subpage-toggle').render(parent_slug=page['slug'])
+            subpages_html = self.template('partials/subpages').render(
+                toggle=toggle,
+                collapse_class=" collapsed" if should_collapse else "",
+                parent_slug=page['slug'],
+                items=''.join(items)
+            )
+        
+        link = self.template('partials/category-link')
+        categories = ', '.join(
+            link.render(url=f"/category/{category_slug(category)}", label=category)
+            for category in page['categories']
+        )
+        return self.template('partials/post').render(
+            slug=page['slug'],
+            title=page['title'],
+            date=page['date'],
+            description=page['description'],
+            categories=categories,
+            assets_info=asset_info,
+            subpages=subpages_html
+        )
+    
+    def subpage_title(self, page, subpage):
+        """A subpage's title without its parent's title as a prefix"""
+        subpage_title = subpage['title']
+        
+        # Remove parent title prefix if it exists
+        if page['title'] in subpage_title:
+            subpage_title = subpage_title.replace(page['title'], '').strip(' -')
         
-        homepage_html += """    </div>
-    <footer style="margin-top: 50px; text-align: center; color: #7f8c8d; font-size: 0.9em;">
-        <p>Email me at gabrielpenman@gmail.com • <a href="/api/health">API Status</a></p>
-    </footer>
-</body>
-</html>"""
+        # If title is empty or too similar, use the path name
+        if not subpage_title or subpage_title.lower() == page['title'].lower():
+            path_name = subpage['slug'].split('/')[-1]
+            subpage_title = path_name.replace('-', ' ').title()
+        return subpage_title
+    
+    def render_listing(self, base, title, heading, pages, posts, category_nav=""):
+        """
+        Render a listing of posts in chunks of page_size.
+        Returns {output path: html}; the first chunk is base/index.html.
+        """
+        template = self.template('homepage')
+        link = self.template('partials/pagination-link')
+        total = max(1, -(-len(pages) // self.page_size))
+        rendered = {}
         
-        # Write homepage
-        with open(self.output_dir / 'index.html', 'w', encoding='utf-8') as f:
-            f.write(homepage_html)
+        for number in range(1, total + 1):
+            chunk = pages[(number - 1) * self.page_size:number * self.page_size]
+            pagination = ""
+            if total > 1:
+                pagination = self.template('partials/pagination').render(
+                    previous=link.render(url=listing_url(base, number - 1), rel='prev', label='← Newer')
+                    if number > 1 else "",
+                    next=link.render(url=listing_url(base, number + 1), rel='next', label='Older →')
+                    if number < total else "",
+                    number=number,
+                    total=total
+                )
+            html = template.render(
+                title=title if number == 1 else f"{title} (page {number})",
+                heading=heading,
+                category_nav=category_nav,
+                posts='\n'.join(posts[page['slug']] for page in chunk),
+                pagination=pagination
+            )
+            if self.minify:
+                html = minify_html(html)
+            rendered[listing_path(base, number)] = html
+        return rendered
+    
+    def write_listings(self, top_level_pages, subpages_map):
+        """
+        Write the paginated homepage, a paginated listing per category and index.json.
+        Returns the output paths written, so stale chunks can be removed later.
+        """
+        posts = {
+            page['slug']: self.render_post(page, subpages_map.get(page['slug'], []))
+            for page in top_level_pages
+        }
+        
+        # Group posts by category slug; newest first, like the homepage
+        categories = {}
+        for page in top_level_pages:
+            for category in page['categories']:
+                slug = category_slug(category)
+                if slug not in categories:
+                    categories[slug] = {'name': category, 'pages': []}
+                listed = categories[slug]['pages']
+                if not listed or listed[-1] is not page:
+                    listed.append(page)
+        
+        link = self.template('partials/category-link')
+        category_nav = ""
+        if categories:
+            category_nav = self.template('partials/category-nav').render(links=''.join(
+                link.render(url=f"/category/{slug}", label=f"{category['name']} ({len(category['pages'])})")
+                for slug, category in sorted(categories.items())
+            ))
+        
+        listings = self.render_listing('', SITE_TITLE, SITE_TITLE, top_level_pages, posts, category_nav)
+        homepage_urls = [listing_url('', number) for number in range(1, len(listings) + 1)]
+        for slug, category in sorted(categories.items()):
+            base = f"category/{slug}/"
+            listings.update(self.render_listing(
+                base, f"{category['name']} - {SITE_TITLE}", f"Category: {category['name']}",
+                category['pages'], posts, category_nav
+            ))
+        
+        for path, html in listings.items():
+            (self.output_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            write_if_changed(self.output_dir / path, html)
+        
+        index = {
+            'title': SITE_TITLE,
+            'page_size': self.page_size,
+            'homepage': homepage_urls,
+            'categories': {
+                category['name']: {
+                    'url': f"/category/{slug}",
+                    'pages': [page['slug'] for page in category['pages']]
+                }
+                for slug, category in sorted(categories.items())
+            },
+            'pages': [
+                {
+                    'title': page['title'],
+                    'url': f"/{page['slug']}",
+                    'date': page['date'],
+                    'description': page['description'],
+                    'categories': page['categories'],
+                    'subpages': [
+                        {'title': self.subpage_title(page, subpage), 'url': f"/{subpage['slug']}"}
+                        for subpage in subpages_map.get(page['slug'], [])
+                    ]
+                }
+                for page in top_level_pages
+            ]
+        }
+        write_if_changed(self.output_dir / JSON_INDEX_NAME, json.dumps(index, indent=2) + '\n')
+        
+        return sorted(listings) + [JSON_INDEX_NAME]
+    
+    def compress_outputs(self, outputs):
+        """Precompress text outputs whose .gz/.br siblings are missing or stale"""
+        written = 0
+        for output in outputs:
+            path = self.output_dir / output
+            if path.suffix in COMPRESSIBLE_SUFFIXES and path.is_file():
+                written += len(precompress_file(path))
+        if written:
+            encodings = 'gzip and brotli' if brotli is not None else 'gzip'
+            print(f"Precompressed {written} files ({encodings})")
     
-    def compile_all(self):
-        """Compile all pages and generate homepage"""
+    def write_assets_manifest(self, pages):
+        """Write assets-manifest.json mapping every asset URL to its fingerprinted URL"""
+        assets = {}
+        for entry in pages.values():
+            slug = entry['page']['slug']
+            for asset, fingerprinted in entry.get('assets', {}).items():
+                assets[f"/assets/{slug}/{asset}"] = f"/assets/{slug}/{fingerprinted}"
+        write_if_changed(self.output_dir / ASSETS_MANIFEST_NAME,
+                         json.dumps(assets, indent=2, sort_keys=True) + '\n')
+    
+    def compile_all(self, clean=False):
+        """Compile changed pages and generate homepage (clean=True rebuilds everything)"""
         print("=== Modular Blog Compiler ===")
-        print("Cleaning output directory...")
-        self.clean_output()
+        if clean:
+            print("Cleaning output directory...")
+            self.clean_output()
+        else:
+            (self.output_dir / "assets").mkdir(parents=True, exist_ok=True)
         
         print("Compiling pages...")
         self.generate_homepage()
@@ -451,6 +1136,11 @@ class ModularBlogCompiler:
         asset_dirs = list((self.output_dir / 'assets').glob('*')) if (self.output_dir / 'assets').exists() else []
         
         print("\n=== Compilation Complete! ===")
+        print(f"Compiled {len(self.build_stats['compiled'])} pages, "
+              f"skipped {len(self.build_stats['skipped'])} unchanged, "
+              f"removed {len(self.build_stats['removed'])}")
+        if self.build_stats['failed']:
+            print(f"Failed to compile: {', '.join(self.build_stats['failed'])}")
         print(f"Generated {len(html_files)} HTML pages")
         print(f"Created asset directories for {len(asset_dirs)} pages")
         
@@ -461,6 +1151,131 @@ class ModularBlogCompiler:
         print(f"To serve with API: python flask_server.py")
         print(f"Static files location: {self.output_dir}")
 
+class PageWatcher:
+    """
+    Poll pages/ for changes (stdlib only) and rebuild just the affected pages and the
+    homepage, optionally telling flask_server.py (--live-reload) to reload browsers.
+    """
+    
+    def __init__(self, compiler, interval=0.5, debounce=0.3, notify_url=None):
+        self.compiler = compiler
+        self.interval = interval
+        self.debounce = debounce
+        self.notify_url = notify_url
+    
+    def snapshot(self):
+        """(mtime, size) of every file under pages_dir and templates_dir"""
+        files = {}
+        for top in (self.compiler.pages_dir, self.compiler.templates_dir):
+            for root, dirs, names in os.walk(top):
+                dirs[:] = [d for d in dirs if d != '__pycache__' and not d.startswith('.')]
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # deleted while walking
+                    files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+    
+    def dirty_pages(self, paths):
+        """
+        Every page key that could contain the changed paths (pages may be nested),
+        or None - rebuild everything - when a site template changed.
+        """
+        dirty = set()
+        for path in paths:
+            if not Path(path).is_relative_to(self.compiler.pages_dir):
+                return None
+            parts = Path(path).relative_to(self.compiler.pages_dir).parts[:-1]
+            for depth in range(1, len(parts) + 1):
+                dirty.add('/'.join(parts[:depth]))
+        return dirty
+    
+    def rebuild(self, changed):
+        started = time.perf_counter()
+        self.compiler.generate_homepage(dirty=self.dirty_pages(changed))
+        stats = self.compiler.build_stats
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        slugs = stats['compiled'] + stats['removed']
+        print(f"Rebuilt {', '.join(slugs) or 'homepage'} in {elapsed:.0f} ms")
+        if self.notify_url:
+            self.notify(slugs)
+    
+    def notify(self, slugs):
+        """POST the rebuilt slugs to the Flask server's live-reload endpoint"""
+        request = urllib.request.Request(
+            self.notify_url,
+            data=json.dumps({'slugs': slugs}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            urllib.request.urlopen(request, timeout=2).close()
+        except OSError as e:
+            print(f"Warning: Could not notify {self.notify_url}: {e}")
+    
+    def run(self):
+        print(f"Watching {self.compiler.pages_dir} and {self.compiler.templates_dir} for changes (Ctrl+C to stop)...")
+        previous = self.snapshot()
+        try:
+            while True:
+                time.sleep(self.interval)
+                current = self.snapshot()
+                if current == previous:
+                    continue
+                
+                # Wait for the burst of saves to settle before building
+                changed = set()
+                while current != previous:
+                    changed.update(path for path in current.keys() | previous.keys()
+                                   if current.get(path) != previous.get(path))
+                    previous = current
+                    time.sleep(self.debounce)
+                    current = self.snapshot()
+                
+                # A template typo or a file deleted mid-save shouldn't stop the watcher
+                try:
+                    self.rebuild(changed)
+                except Exception as e:
+                    print(f"Rebuild failed: {e}")
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
 if __name__ == "__main__":
-    compiler = ModularBlogCompiler()
-    compiler.compile_all()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Compile the blog")
+    parser.add_argument("--clean", action="store_true", help="Delete output/ and rebuild every page")
+    parser.add_argument("--jobs", "-j", type=int, default=1, 
+                       help="Pages to compile in parallel (0 = one per CPU, default: 1)")
+    parser.add_argument("--watch", "-w", action="store_true", 
+                       help="After building, watch pages/ and rebuild changed pages")
+    parser.add_argument("--notify", nargs="?", const="http://localhost:5000/api/dev/reload", 
+                       help="With --watch, POST rebuilt pages to this flask_server.py --live-reload URL "
+                            "(default: http://localhost:5000/api/dev/reload)")
+    parser.add_argument("--asset-mode", choices=ASSET_MODES, default="link", 
+                       help="How to publish changed assets: hard link, falling back to reflink and "
+                            "copy (default); reflink, falling back to copy; or always copy")
+    parser.add_argument("--no-compress", action="store_true", 
+                       help="Don't write .gz/.br copies of HTML, CSS, JS and JSON outputs")
+    parser.add_argument("--max-depth", type=int, default=MAX_PAGE_DEPTH, 
+                       help=f"Directory levels below pages/ to search for pages (default: {MAX_PAGE_DEPTH})")
+    parser.add_argument("--templates", default="templates", 
+                       help="Directory of site layouts: base.html, homepage.html, partials/ (default: templates)")
+    parser.add_argument("--page-size", type=int, default=LISTING_PAGE_SIZE, 
+                       help=f"Posts per homepage/category page (default: {LISTING_PAGE_SIZE})")
+    parser.add_argument("--minify", action="store_true", 
+                       help="Strip comments and whitespace from pages and their inline CSS/JS")
+    
+    args = parser.parse_args()
+    
+    compiler = ModularBlogCompiler(jobs=args.jobs or os.cpu_count() or 1, asset_mode=args.asset_mode, 
+                                   compress=not args.no_compress, minify=args.minify, 
+                                   max_depth=args.max_depth, templates_dir=args.templates, 
+                                   page_size=args.page_size)
+    compiler.compile_all(clean=args.clean)
+    
+    if args.watch:
+        PageWatcher(compiler, notify_url=args.notify).run()
\ No newline at end of file
@@ -30,7 +30,7 @@ fi
 
 # Run the compiler
 echo "📝 Running modular blog compiler..."
-$PYTHON_CMD compile.py
+$PYTHON_CMD compile.py "$@"
 
 # Check if compilation was successful
 if [ $? -eq 0 ] && [ -d "output" ]; then
@@ -166,7 +166,9 @@ if command -v curl &> /dev/null; then
         else
             echo "   ⚠️  WARNING: nginx not configured for /assets/ directory"
             echo "   Add this to your nginx server block:"
-            echo "   location /assets/ { alias $(pwd)/output/assets/; expires 1h; }"
+            echo "   location /assets/ { alias $(pwd)/output/assets/; expires 1h; gzip_static on; }"
+            echo "   Fingerprinted assets (name.<hash>.ext, see output/assets-manifest.json) never change:"
+            echo "   location ~ \"^/assets/.+\\.[0-9a-f]{8}\\.[^./]+\$\" { root $(pwd)/output; add_header Cache-Control \"public, max-age=31536000, immutable\"; }"
         fi
     else
         echo "   ℹ️  nginx not found - if using production, ensure /assets/ is configured"
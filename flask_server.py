@@ -6,18 +6,57 @@ Includes WebSocket support for real-time features.
 """
 
 import os
+import re
 import sys
+import mimetypes
 import importlib.util
 from pathlib import Path
 from flask import Flask, jsonify, send_from_directory, request
 from flask_cors import CORS
 from flask_socketio import SocketIO
 
+LIVE_RELOAD_NAMESPACE = '/live-reload'
+
+# compile.py publishes assets as name.<8 hex digits>.ext; their content never changes
+FINGERPRINTED_ASSET = re.compile(r'^assets/.+\.[0-9a-f]{8}(\.[^./]+)?$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# compile.py writes these next to HTML/CSS/JS outputs, preferred in this order
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Injected before </body> of served HTML when running with --live-reload
+LIVE_RELOAD_SNIPPET = b"""<script>
+(function () {
+    function connect() {
+        var socket = io('/live-reload');
+        socket.on('reload', function (data) {
+            var path = location.pathname.replace(/^\\/|\\/$|\\.html$/g, '');
+            var slugs = data.slugs || [];
+            if (!path || !slugs.length || slugs.some(function (slug) {
+                return slug === path || slug.replace(/\\//g, '-') === path;
+            })) {
+                location.reload();
+            }
+        });
+    }
+    if (typeof io === 'undefined') {
+        var script = document.createElement('script');
+        script.src = 'https://cdn.socket.io/4.5.0/socket.io.min.js';
+        script.onload = connect;
+        document.head.appendChild(script);
+    } else {
+        connect();
+    }
+})();
+</script>
+"""
+
 class BlogFlaskServer:
-    def __init__(self, pages_dir="pages", static_dir="output", port=5000):
+    def __init__(self, pages_dir="pages", static_dir="output", port=5000, live_reload=False):
         self.pages_dir = Path(pages_dir)
         self.static_dir = Path(static_dir)
         self.port = port
+        self.live_reload = live_reload
         self.app = Flask(__name__)
         
         # Enable CORS for API endpoints
@@ -28,6 +67,8 @@ class BlogFlaskServer:
         
         # Setup basic routes
         self._setup_basic_routes()
+        if self.live_reload:
+            self._setup_live_reload()
         
         # Auto-register page API endpoints and WebSocket handlers
         self._register_page_apis()
@@ -39,7 +80,7 @@ class BlogFlaskServer:
         def serve_homepage():
             """Serve the homepage"""
             try:
-                return send_from_directory(self.static_dir, 'index.html')
+                return self._send_static(self.static_dir, 'index.html')
             except FileNotFoundError:
                 return jsonify({'error': 'Homepage not found. Run compile.py first.'}), 404
         
@@ -62,13 +103,17 @@ class BlogFlaskServer:
             # First try the exact filename (must be a file, not directory)
             file_path = self.static_dir / filename
             if file_path.exists() and file_path.is_file():
-                return send_from_directory(str(self.static_dir), filename)
+                if FINGERPRINTED_ASSET.match(filename):
+                    response = self._send_static(self.static_dir, filename, max_age=IMMUTABLE_MAX_AGE)
+                    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+                    return response
+                return self._send_static(self.static_dir, filename)
             
             # If not found and no extension, try looking for directory/index.html
             if '.' not in filename:
                 index_path = self.static_dir / filename / "index.html"
                 if index_path.exists():
-                    return send_from_directory(str(self.static_dir / filename), "index.html")
+                    return self._send_static(self.static_dir / filename, "index.html")
             
             return jsonify({'error': f'File {filename} not found'}), 404
         
@@ -114,6 +159,46 @@ class BlogFlaskServer:
             pages.sort(key=lambda x: x.get('date', ''), reverse=True)
             return jsonify({'pages': pages})
     
+    def _setup_live_reload(self):
+        """Development only: reload browsers when `compile.py --watch --notify` rebuilds pages"""
+        
+        @self.app.route('/api/dev/reload', methods=['POST'])
+        def live_reload():
+            """Called by the compiler's watch mode after a rebuild"""
+            if request.remote_addr not in ('127.0.0.1', '::1'):
+                return jsonify({'error': 'Live reload is only available locally'}), 403
+            
+            data = request.get_json(silent=True) or {}
+            self.socketio.emit('reload', {'slugs': data.get('slugs', [])}, namespace=LIVE_RELOAD_NAMESPACE)
+            return jsonify({'success': True})
+        
+        @self.app.after_request
+        def inject_live_reload(response):
+            if response.mimetype != 'text/html' or response.status_code != 200:
+                return response
+            
+            response.direct_passthrough = False
+            body = response.get_data()
+            if b'</body>' in body:
+                response.set_data(body.replace(b'</body>', LIVE_RELOAD_SNIPPET + b'</body>', 1))
+            return response
+    
+    def _send_static(self, directory, filename, max_age=None):
+        """Send a static file, using its precompressed .br/.gz sibling when the client accepts it"""
+        path = Path(directory) / filename
+        # Live reload rewrites HTML bodies, so it needs the uncompressed file
+        if not self.live_reload and path.is_file():
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                sibling = path.with_name(path.name + suffix)
+                if (request.accept_encodings[encoding] and sibling.is_file()
+                        and sibling.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+                    response = send_from_directory(str(directory), filename + suffix, max_age=max_age,
+                                                   mimetype=mimetypes.guess_type(filename)[0])
+                    response.headers['Content-Encoding'] = encoding
+                    response.vary.add('Accept-Encoding')
+                    return response
+        return send_from_directory(str(directory), filename, max_age=max_age)
+    
     def _get_page_directories(self):
         """Get all page directories"""
         if not self.pages_dir.exists():
@@ -229,6 +314,8 @@ class BlogFlaskServer:
         print(f"API base URL: http://localhost:{self.port}/api/")
         print(f"WebSocket URL: http://localhost:{self.port}")
         print(f"Assets URL pattern: http://localhost:{self.port}/assets/<page>/<file>")
+        if self.live_reload:
+            print(f"Live reload enabled: run 'python3 compile.py --watch --notify'")
         
         # Use socketio.run instead of app.run for WebSocket support
         self.socketio.run(
@@ -251,13 +338,16 @@ def main():
                        help="Static files directory (default: output)")
     parser.add_argument("--no-debug", action="store_true", 
                        help="Disable debug mode")
+    parser.add_argument("--live-reload", action="store_true", 
+                       help="Reload open pages when compile.py --watch --notify rebuilds them")
     
     args = parser.parse_args()
     
     server = BlogFlaskServer(
         pages_dir=args.pages,
         static_dir=args.static,
-        port=args.port
+        port=args.port,
+        live_reload=args.live_reload
     )
     
     server.run(debug=not args.no_debug)
@@ -5,17 +5,54 @@ API endpoints and WebSocket handlers for Collaborative Canvas
 from flask import Blueprint, jsonify, request
 from flask_socketio import emit, join_room, leave_room
 from shared.database import get_db
-from shared.websocket_utils import WebSocketRoomManager, websocket_success_response, websocket_error_handler, validate_websocket_data
+from shared.websocket_utils import (
+    WebSocketRoomManager, WebSocketRateLimiter, OutboundQueue, StaggeredResync, WebSocketSchema,
+    rate_limited, validate_payload,
+    websocket_envelope, websocket_ack, ENVELOPE_LIGHT, ACK_CALLBACK,
+    websocket_success_response, websocket_error_handler, validate_websocket_data
+)
 from datetime import datetime
 import json
 
 bp = Blueprint('collaborative_canvas', __name__, url_prefix='/api/collaborative-canvas')
 
 # Global room manager for the single collaborative canvas
-canvas_room_manager = WebSocketRoomManager()
+canvas_room_manager = WebSocketRoomManager(page_slug='collaborative-canvas')
 CANVAS_ROOM_ID = "main_canvas"
 MAX_PLAYERS = 8
 
+# Warm restart: room snapshots younger than this are restored on startup, and restored
+# players who don't reconnect within the grace period lose their slot
+SNAPSHOT_MAX_AGE_SECONDS = 600
+RESTORED_PLAYER_GRACE_SECONDS = 60
+RESYNC_INTERVAL_SECONDS = 0.1
+
+# Each stroke costs a disk write and a broadcast, so bound how fast one client can send them
+STROKE_RATE_PER_SECOND = 10
+STROKE_BURST = 30
+stroke_rate_limiter = WebSocketRateLimiter(rate=STROKE_RATE_PER_SECOND, burst=STROKE_BURST)
+
+# Strokes are stored forever, so cap their size; the client splits longer strokes
+ALLOWED_COLORS = ('black', 'white', 'red', 'blue', 'green', 'yellow', 'orange')
+MAX_STROKE_POINTS = 2000
+
+DRAW_STROKE_SCHEMA = WebSocketSchema({
+    'player_id': {'type': str, 'max_length': 64},
+    'stroke': {'type': dict, 'allow_extra': False, 'same_length': ('x', 'y'), 'schema': {
+        'id': {'type': str, 'max_length': 64, 'required': False},
+        'x': {'type': list, 'min_items': 1, 'max_items': MAX_STROKE_POINTS, 'item_type': (int, float)},
+        'y': {'type': list, 'min_items': 1, 'max_items': MAX_STROKE_POINTS, 'item_type': (int, float)},
+        'color': {'type': str, 'allowed': ALLOWED_COLORS}
+    }}
+})
+
+# Per-client cap on queued outbound messages before a slow client is asked to resync
+MAX_PENDING_MESSAGES = 200
+
+def get_room_sids(room):
+    """Get the Socket.IO session ids of all players in a room"""
+    return [player['data'].get('sid') for player in room.players.values() if player['data'].get('sid')]
+
 # Create a startup backup to preserve any existing canvas data
 def create_startup_backup():
     """Create a backup of existing canvas data on server startup"""
@@ -38,6 +75,11 @@ def create_startup_backup():
 # Create startup backup
 create_startup_backup()
 
+# Restore rooms from before the restart so reconnecting players keep their slots
+restored_rooms = canvas_room_manager.restore_snapshot(max_age_seconds=SNAPSHOT_MAX_AGE_SECONDS)
+if restored_rooms:
+    print(f"Restored {restored_rooms} canvas room(s) from snapshot")
+
 @bp.route('/canvas-info')
 def get_canvas_info():
     """Get current canvas state and player information"""
@@ -106,6 +148,47 @@ def get_canvas_backups():
 def register_websocket_handlers(socketio):
     """Register WebSocket event handlers for collaborative canvas"""
     
+    # Strokes and player counts go through a bounded per-client queue so one slow
+    # consumer cannot hold up the room; each client gets its next batch once it acks
+    # the last one, and counts are coalesced to the latest value
+    canvas_outbound = OutboundQueue(
+        socketio,
+        namespace='/collaborative-canvas',
+        max_pending=MAX_PENDING_MESSAGES,
+        overflow_event='canvas_resync_required'
+    )
+    
+    # After a warm restart every client reconnects at once - spread the full-state resyncs out
+    canvas_resync = StaggeredResync(
+        socketio,
+        interval=RESYNC_INTERVAL_SECONDS,
+        window_seconds=RESTORED_PLAYER_GRACE_SECONDS
+    )
+    
+    def send_canvas_state(sid):
+        """Send the full canvas state to one client"""
+        canvas_state = get_db().get_page_data('collaborative-canvas', 'current_canvas', {
+            'strokes': [],
+            'last_updated': datetime.now().isoformat()
+        })
+        room = canvas_room_manager.get_room(CANVAS_ROOM_ID)
+        socketio.emit('canvas_state_update', websocket_success_response({
+            'canvas_state': canvas_state,
+            'player_count': room.get_player_count() if room else 0
+        }), to=sid, namespace='/collaborative-canvas')
+    
+    def prune_unclaimed_players():
+        """Drop restored players that never reconnected after the restart"""
+        socketio.sleep(RESTORED_PLAYER_GRACE_SECONDS)
+        removed = canvas_room_manager.prune_unclaimed()
+        canvas_room_manager.save_snapshot()
+        if removed:
+            print(f"Removed {removed} restored player(s) that did not reconnect")
+    
+    if canvas_room_manager.restored_at is not None:
+        canvas_resync.begin()
+        socketio.start_background_task(prune_unclaimed_players)
+    
     @socketio.on('connect', namespace='/collaborative-canvas')
     def on_connect():
         emit('connected', websocket_success_response({
@@ -117,11 +200,14 @@ def register_websocket_handlers(socketio):
     def on_disconnect():
         from flask import request
         
+        session_id = request.sid
+        stroke_rate_limiter.forget(session_id)
+        canvas_outbound.forget(session_id)
+        
         # Try to find and remove the disconnected player from any room
         room = canvas_room_manager.get_room(CANVAS_ROOM_ID)
         if room:
             # Look for player by session ID (this is imperfect but helps)
-            session_id = request.sid
             players_to_remove = []
             
             for player_id, player_data in room.players.items():
@@ -143,17 +229,19 @@ def register_websocket_handlers(socketio):
         
         # Clean up empty rooms
         canvas_room_manager.cleanup_empty_rooms()
+        if room and players_to_remove:
+            canvas_room_manager.save_snapshot()
         
         # Broadcast updated player count
         room = canvas_room_manager.get_room(CANVAS_ROOM_ID)
         player_count = room.get_player_count() if room else 0
         
         if room:
-            emit('player_count_update', {
+            canvas_outbound.enqueue_many(get_room_sids(room), 'player_count_update', {
                 'player_count': player_count,
                 'max_players': MAX_PLAYERS,
                 'room_full': player_count >= MAX_PLAYERS
-            }, room=CANVAS_ROOM_ID)
+            }, coalesce_key='player_count')
     
     @socketio.on('join_canvas', namespace='/collaborative-canvas')
     def join_canvas(data):
@@ -169,8 +257,11 @@ def register_websocket_handlers(socketio):
         if not room:
             room = canvas_room_manager.create_room(CANVAS_ROOM_ID, MAX_PLAYERS)
         
+        # Players restored from a warm-restart snapshot (or rejoining on a new connection) already hold a slot
+        reconnecting = player_id in room.players
+        
         # Check if room is full
-        if room.is_full():
+        if room.is_full() and not reconnecting:
             # Try to clean up any stale connections first
             cleaned = canvas_room_manager.cleanup_empty_rooms()
             room = canvas_room_manager.get_room(CANVAS_ROOM_ID)  # Refresh room reference
@@ -199,39 +290,58 @@ def register_websocket_handlers(socketio):
         # Debug: print room status
         print(f"Room status: {room.get_player_count()}/{MAX_PLAYERS} players")
         
-        # Add player to room
-        success, message = room.add_player(player_id, {
+        player_data = {
             'joined_at': datetime.now().isoformat(),
-            'name': data.get('name', f'Player {player_id[:8]}')
-        })
-        
-        if not success:
-            return websocket_error_handler(message)
+            'name': data.get('name', f'Player {player_id[:8]}'),
+            'sid': request.sid
+        }
+        
+        if reconnecting and not room.is_restored_player(player_id):
+            # Same player on a new connection - just refresh their session id
+            room.players[player_id]['data'] = player_data
+        else:
+            # Add player to room
+            success, message = room.add_player(player_id, player_data)
+            
+            if not success:
+                return websocket_error_handler(message)
         
         # Join the socket room
         join_room(CANVAS_ROOM_ID)
         
         # Determine if this player is the host (first player)
-        is_host = room.get_player_count() == 1
-        if is_host:
-            room.data['host'] = player_id
+        if reconnecting:
+            is_host = room.data.get('host') == player_id
+        else:
+            is_host = room.get_player_count() == 1
+            if is_host:
+                room.data['host'] = player_id
         
-        # Send current canvas state to the new joiner
-        db = get_db()
-        canvas_state = db.get_page_data('collaborative-canvas', 'current_canvas', {
-            'strokes': [],
-            'last_updated': datetime.now().isoformat()
-        })
+        canvas_room_manager.save_snapshot()
         
-        emit('canvas_joined', websocket_success_response({
+        joined_data = {
             'room_id': CANVAS_ROOM_ID,
             'player_count': room.get_player_count(),
             'max_players': MAX_PLAYERS,
-            'is_host': is_host,
-            'canvas_state': canvas_state
-        }))
-        
-        print(f"Player {player_id} joined canvas, sending {len(canvas_state.get('strokes', []))} strokes")
+            'is_host': is_host
+        }
+        
+        if canvas_resync.is_active():
+            # Warm restart: confirm the join now and send the full canvas in a staggered slot
+            emit('canvas_joined', websocket_success_response(joined_data))
+            delay = canvas_resync.schedule(send_canvas_state, request.sid)
+            print(f"Player {player_id} rejoined canvas, resync in {delay:.2f}s")
+        else:
+            # Send current canvas state to the new joiner
+            db = get_db()
+            canvas_state = db.get_page_data('collaborative-canvas', 'current_canvas', {
+                'strokes': [],
+                'last_updated': datetime.now().isoformat()
+            })
+            joined_data['canvas_state'] = canvas_state
+            emit('canvas_joined', websocket_success_response(joined_data))
+            
+            print(f"Player {player_id} joined canvas, sending {len(canvas_state.get('strokes', []))} strokes")
         
         # Notify all players of the new joiner
         emit('player_joined', {
@@ -261,6 +371,7 @@ def register_websocket_handlers(socketio):
         # Remove player from room
         room.remove_player(player_id)
         leave_room(CANVAS_ROOM_ID)
+        canvas_room_manager.save_snapshot()
         
         # Always save a backup when anyone leaves (not just host)
         db = get_db()
@@ -295,6 +406,7 @@ def register_websocket_handlers(socketio):
         # Clean up empty rooms
         if room.get_player_count() == 0:
             canvas_room_manager.remove_room(CANVAS_ROOM_ID)
+            canvas_room_manager.save_snapshot()
         
         # Notify remaining players
         emit('player_left', {
@@ -308,12 +420,11 @@ def register_websocket_handlers(socketio):
         emit('canvas_left', websocket_success_response({'message': 'Left canvas successfully'}))
     
     @socketio.on('draw_stroke', namespace='/collaborative-canvas')
+    @websocket_envelope(envelope=ENVELOPE_LIGHT, ack=ACK_CALLBACK)
+    @rate_limited(limiter=stroke_rate_limiter, event='draw_stroke')
+    @validate_payload(DRAW_STROKE_SCHEMA)
     def draw_stroke(data):
         """Handle drawing stroke from a player"""
-        valid, message = validate_websocket_data(data, ['player_id', 'stroke'])
-        if not valid:
-            return websocket_error_handler(message)
-        
         player_id = data['player_id']
         stroke_data = data['stroke']
         
@@ -321,20 +432,6 @@ def register_websocket_handlers(socketio):
         if not room or player_id not in room.players:
             return websocket_error_handler("Player not in canvas room")
         
-        # Validate stroke data
-        if not isinstance(stroke_data, dict):
-            return websocket_error_handler("Invalid stroke data format")
-        
-        required_stroke_fields = ['x', 'y', 'color']
-        for field in required_stroke_fields:
-            if field not in stroke_data:
-                return websocket_error_handler(f"Stroke missing {field}")
-        
-        # Validate color is one of the allowed colors
-        allowed_colors = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'orange']
-        if stroke_data['color'] not in allowed_colors:
-            return websocket_error_handler(f"Color must be one of: {', '.join(allowed_colors)}")
-        
         # Add timestamp and player info to stroke
         stroke_data['timestamp'] = datetime.now().isoformat()
         stroke_data['player_id'] = player_id
@@ -364,16 +461,16 @@ def register_websocket_handlers(socketio):
             print(f"Saved canvas backup at {canvas_state['stroke_count']} strokes")
         
         # Broadcast stroke to all other players in the room
-        emit('stroke_received', {
+        canvas_outbound.enqueue_many(get_room_sids(room), 'stroke_received', {
             'stroke': stroke_data,
             'from_player': player_id
-        }, room=CANVAS_ROOM_ID, include_self=False)
+        }, skip_sid=request.sid)
         
-        # Acknowledge stroke to sender
-        emit('stroke_acknowledged', websocket_success_response({
+        # Acknowledge stroke via the client's Socket.IO callback (nothing is sent if it didn't ask)
+        return websocket_ack('stroke_acknowledged', {
             'stroke_id': stroke_data.get('id', 'unknown'),
             'total_strokes': len(canvas_state['strokes'])
-        }))
+        })
     
     # Note: Clear canvas functionality removed to maintain communal permanent canvas
     
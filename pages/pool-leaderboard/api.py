@@ -1,14 +1,59 @@
 """
 Pool Leaderboard API - ELO rating system for pool players
+
+Maintenance CLI (run from the repository root, with the server stopped):
+    PYTHONPATH=. python3 pages/pool-leaderboard/api.py import games.jsonl [--format csv] [--create-missing]
+    PYTHONPATH=. python3 pages/pool-leaderboard/api.py rebuild
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_socketio import emit
 from shared.database import get_db
+from array import array
+from collections import OrderedDict
 from datetime import datetime
+from functools import wraps
+import bisect
+import csv
+import hashlib
+import io
+import itertools
+import json
 import math
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # analytics endpoints report 503 without NumPy
+    np = None
 
 bp = Blueprint('pool_leaderboard', __name__, url_prefix='/api/pool-leaderboard')
 
+RECENT_GAMES_LIMIT = 20
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+RATING_HISTORY_POINTS = 50
+SPARKLINE_POINTS = 30
+HISTOGRAM_BUCKET_SIZE = 50
+IDEMPOTENCY_MAX_KEYS = 1000
+IDEMPOTENCY_TTL_SECONDS = 600
+IDEMPOTENCY_WAIT_SECONDS = 10  # how long a retry waits for the original request to finish
+MAX_RATING_HISTORY_POINTS = 500
+LEADERBOARD_NAMESPACE = '/pool-leaderboard'
+DEFAULT_RATING = 1200
+RESET_RATING = 1000
+CHECKPOINT_INTERVAL = 100  # games between stored rating checkpoints
+COMPACT_TOMBSTONES = 100   # deleted games kept in the log before it is rewritten
+MAX_SIMULATION_RUNS = 10000
+MAX_SIMULATION_GAMES = 500
+TRAJECTORY_POINTS = 20
+MARGIN_MULTIPLIERS = {
+    'close': 1.0,
+    'comfortable': 1.1,
+    'decisive': 1.2
+}
+
 class PoolEloSystem:
     @staticmethod
     def calculate_expected_score(rating_a, rating_b):
@@ -16,8 +61,8 @@ class PoolEloSystem:
         return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
     
     @staticmethod
-    def calculate_k_factor(games_played, rating, is_winner=True, last_played=None):
-        """Calculate K-factor based on games played, rating, and activity"""
+    def calculate_k_factor(games_played, rating, is_winner=True, last_played=None, now=None):
+        """Calculate K-factor based on games played, rating, and activity (as of `now`, default current time)"""
         base_k = 40 if games_played < 20 else (
             20 if rating >= 2200 else
             28 if rating >= 1800 else
@@ -35,10 +80,9 @@ class PoolEloSystem:
         # Check for returning player after long break
         returning_player_boost = 1.0
         if last_played and games_played >= 5:
-            from datetime import datetime
             try:
                 last_game = datetime.fromisoformat(last_played)
-                time_since = datetime.now() - last_game
+                time_since = (now or datetime.now()) - last_game
                 # If more than 2 months (60 days) since last game
                 if time_since.days > 60:
                     returning_player_boost = 1.8  # Boost for returning players
@@ -52,32 +96,980 @@ class PoolEloSystem:
         final_k = base_k * new_player_boost * returning_player_boost * win_multiplier
         
         return int(final_k)
+    
+    @staticmethod
+    def expected_score_matrix(ratings):
+        """Expected score of every player (row) against every other player (column), via NumPy"""
+        ratings = np.asarray(ratings, dtype=float)
+        return 1 / (1 + 10 ** ((ratings[np.newaxis, :] - ratings[:, np.newaxis]) / 400))
+    
+    @staticmethod
+    def k_factor_array(games_played, ratings, is_winner):
+        """Vectorized calculate_k_factor (without the returning-player boost, which depends on dates)"""
+        base_k = np.where(games_played < 20, 40, np.where(ratings >= 2200, 20, np.where(ratings >= 1800, 28, 35)))
+        new_player_boost = np.where(games_played < 5, 2.0, np.where(games_played < 10, 1.6, 1.0))
+        win_multiplier = np.where(is_winner, 1.3, 0.9)
+        return np.trunc(base_k * new_player_boost * win_multiplier)
+    
+    @staticmethod
+    def apply_game(players, winner, loser, margin='close', played_at=None, game_id=None):
+        """Apply one game result to `players` in place and return its history record"""
+        played_at = played_at or datetime.now()
+        timestamp = played_at.isoformat()
+        
+        # Calculate ELO changes
+        winner_rating = players[winner]['rating']
+        loser_rating = players[loser]['rating']
+        
+        # Expected scores
+        winner_expected = PoolEloSystem.calculate_expected_score(winner_rating, loser_rating)
+        loser_expected = PoolEloSystem.calculate_expected_score(loser_rating, winner_rating)
+        
+        # Margin adjustments
+        margin_multiplier = MARGIN_MULTIPLIERS.get(margin, 1.0)
+        
+        # K-factors with activity boost
+        winner_k = PoolEloSystem.calculate_k_factor(
+            players[winner]['games_played'], 
+            winner_rating, 
+            True, 
+            players[winner].get('last_played'),
+            played_at
+        )
+        loser_k = PoolEloSystem.calculate_k_factor(
+            players[loser]['games_played'], 
+            loser_rating, 
+            False, 
+            players[loser].get('last_played'),
+            played_at
+        )
+        
+        # Rating changes
+        winner_change = round(winner_k * margin_multiplier * (1 - winner_expected))
+        loser_change = round(loser_k * margin_multiplier * (0 - loser_expected))
+        
+        # Update player data
+        players[winner]['rating'] += winner_change
+        players[winner]['games_played'] += 1
+        players[winner]['wins'] += 1
+        players[winner]['last_played'] = timestamp
+        
+        players[loser]['rating'] += loser_change
+        players[loser]['games_played'] += 1
+        players[loser]['losses'] += 1
+        players[loser]['last_played'] = timestamp
+        
+        return {
+            'id': game_id if game_id is not None else played_at.timestamp(),
+            'winner': winner,
+            'loser': loser,
+            'margin': margin,
+            'winner_rating_before': winner_rating,
+            'loser_rating_before': loser_rating,
+            'winner_rating_after': players[winner]['rating'],
+            'loser_rating_after': players[loser]['rating'],
+            'winner_change': winner_change,
+            'loser_change': loser_change,
+            'timestamp': timestamp
+        }
 
-@bp.route('/players')
-def get_players():
-    """Get all players sorted by ELO rating"""
-    db = get_db()
-    players = db.get_page_data('pool-leaderboard', 'players', {})
+def new_player(rating=DEFAULT_RATING, created=None):
+    """Fresh player record"""
+    return {
+        "rating": rating,
+        "games_played": 0,
+        "wins": 0,
+        "losses": 0,
+        "created": created or datetime.now().isoformat(),
+        "last_played": None
+    }
+
+def event_time(event):
+    return event.get('timestamp', '')
+
+class RatingProjection:
+    """
+    Player ratings as a projection of the game history event log.
+    
+    `game_history` (games plus `type: 'reset'` events) and `player_registry`
+    (each player's starting state, creation time and active flag) are the source
+    of truth; the `players` collection is the projected state of active players.
+    A checkpoint of every player's state is kept each CHECKPOINT_INTERVAL games,
+    so a deletion or back-dated import only replays the log after the nearest
+    checkpoint instead of all of history.
+    
+    Games get sequential integer ids with an id -> position index. Deleting a game
+    appends its id to `game_tombstones` instead of rewriting the log; tombstoned
+    games are skipped on replay and dropped when the log is next rewritten.
+    """
+    
+    def __init__(self, interval=CHECKPOINT_INTERVAL):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.interval = interval
+        self.registry = {}     # name -> {'initial': player state, 'created', 'active'}
+        self.events = []       # game history in replay (timestamp) order
+        self.checkpoints = []  # [{'position', 'event_id', 'players'}], oldest first
+        self.state = {}        # name -> projected player state, including removed players
+        self.positions = {}    # event id -> index in self.events
+        self.tombstones = set()  # ids of deleted games still in the log
+        self.next_id = 1
+    
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        
+        db = get_db()
+        self.events = sorted(db.get_page_data('pool-leaderboard', 'game_history', []), key=event_time)
+        self.registry = db.get_page_data('pool-leaderboard', 'player_registry', None)
+        if self.registry is None:
+            self.registry = self._registry_from_players(db.get_page_data('pool-leaderboard', 'players', {}))
+            db.set_page_data('pool-leaderboard', 'player_registry', self.registry)
+        
+        self.tombstones = set(db.get_page_data('pool-leaderboard', 'game_tombstones', []))
+        self.next_id = db.get_page_data('pool-leaderboard', 'game_sequence', {}).get('next_game_id', 1)
+        self._index_events()
+        
+        # Only checkpoints that still line up with the log can be trusted
+        self.checkpoints = []
+        for checkpoint in db.get_page_data('pool-leaderboard', 'rating_checkpoints', []):
+            position = checkpoint['position']
+            if position > len(self.events) or self.events[position - 1].get('id') != checkpoint['event_id']:
+                break
+            self.checkpoints.append(checkpoint)
+        
+        # Stored rating fields of games after a deletion are stale until the log is rewritten
+        deleted = [self.positions[game_id] for game_id in self.tombstones if game_id in self.positions]
+        
+        self._loaded = True
+        self._replay(min(deleted, default=len(self.events)))
+    
+    def _index_events(self):
+        self.positions = {event['id']: index for index, event in enumerate(self.events)}
+        int_ids = [event['id'] for event in self.events if isinstance(event['id'], int)]
+        self.next_id = max(self.next_id, max(int_ids, default=0) + 1)
+    
+    def _take_id(self):
+        game_id = self.next_id
+        self.next_id += 1
+        return game_id
+    
+    def _compact(self):
+        """Drop tombstoned games from the log, shifting checkpoints to match"""
+        if not self.tombstones:
+            return False
+        
+        kept = []
+        shifted = {0: 0}  # old position -> new position
+        for index, event in enumerate(self.events):
+            if event['id'] not in self.tombstones:
+                kept.append(event)
+            shifted[index + 1] = len(kept)
+        
+        checkpoints = {}
+        for checkpoint in self.checkpoints:
+            position = shifted[checkpoint['position']]
+            if position:
+                checkpoints[position] = dict(checkpoint, position=position, event_id=kept[position - 1]['id'])
+        
+        self.events = kept
+        self.checkpoints = list(checkpoints.values())
+        self.tombstones = set()
+        self._index_events()
+        return True
+    
+    def _registry_from_players(self, players):
+        """
+        Derive each player's starting state for an existing leaderboard by walking
+        the history backwards from the current ratings.
+        """
+        initial = {name: dict(data) for name, data in players.items()}
+        created = {name: data.get('created') for name, data in players.items()}
+        
+        for event in reversed(self.events):
+            if event.get('type') == 'reset':
+                continue
+            for role, result in (('winner', 'wins'), ('loser', 'losses')):
+                name = event[role]
+                if name not in initial:
+                    # Removed player: only their games in the log are known
+                    initial[name] = new_player(event[f'{role}_rating_after'], event['timestamp'])
+                    created[name] = event['timestamp']
+                    initial[name]['games_played'] = initial[name][result] = 1
+                data = initial[name]
+                data['rating'] = event[f'{role}_rating_before']
+                data['games_played'] = max(data['games_played'] - 1, 0)
+                data[result] = max(data[result] - 1, 0)
+                data['last_played'] = None
+        
+        return {
+            name: {
+                'initial': data,
+                'created': created[name] or datetime.now().isoformat(),
+                'active': name in players
+            }
+            for name, data in initial.items()
+        }
+    
+    def _initial_state(self, name):
+        entry = self.registry[name]
+        return dict(entry['initial'], created=entry['created'])
+    
+    def _apply(self, state, event):
+        """Apply one event to `state`, refreshing a game's derived rating fields"""
+        if event['id'] in self.tombstones:
+            return
+        
+        if event.get('type') == 'reset':
+            for name, data in state.items():
+                if self.registry[name]['created'] <= event['timestamp']:
+                    state[name] = new_player(event.get('rating', RESET_RATING), data['created'])
+            return
+        
+        for name in (event['winner'], event['loser']):
+            if name not in state:
+                state[name] = self._initial_state(name)
+        event.update(PoolEloSystem.apply_game(
+            state, event['winner'], event['loser'], event.get('margin', 'close'),
+            datetime.fromisoformat(event['timestamp']), event['id']
+        ))
+    
+    def _checkpoint(self):
+        position = len(self.events)
+        if position and position % self.interval == 0:
+            self.checkpoints.append({
+                'position': position,
+                'event_id': self.events[-1]['id'],
+                'players': {name: dict(data) for name, data in self.state.items()}
+            })
+            return True
+        return False
     
-    # Convert to sorted list
-    player_list = []
-    for name, data in players.items():
-        player_data = data.copy()
-        player_data['name'] = name
-        if player_data['games_played'] > 0:
-            player_data['win_rate'] = round((player_data['wins'] / player_data['games_played']) * 100, 1)
+    def _replay(self, position):
+        """
+        Rebuild the state from the nearest checkpoint at or before `position`,
+        replaying the rest of the log. Returns the number of events replayed.
+        """
+        while self.checkpoints and self.checkpoints[-1]['position'] > position:
+            self.checkpoints.pop()
+        
+        if self.checkpoints:
+            start = self.checkpoints[-1]['position']
+            state = {name: dict(data) for name, data in self.checkpoints[-1]['players'].items()}
         else:
-            player_data['win_rate'] = 0.0
-        player_list.append(player_data)
+            start = 0
+            state = {}
+        for name in self.registry:
+            if name not in state:
+                state[name] = self._initial_state(name)
+        
+        for index in range(start, len(self.events)):
+            self._apply(state, self.events[index])
+            if (index + 1) % self.interval == 0:
+                self.checkpoints.append({
+                    'position': index + 1,
+                    'event_id': self.events[index]['id'],
+                    'players': {name: dict(data) for name, data in state.items()}
+                })
+        
+        self.state = state
+        return len(self.events) - start
     
-    # Sort by rating (highest first)
-    player_list.sort(key=lambda x: x['rating'], reverse=True)
+    def _save(self, history=True, registry=False, checkpoints=True):
+        db = get_db()
+        db.set_page_data('pool-leaderboard', 'players', self.active_players())
+        if history:
+            self._compact()
+            db.set_page_data('pool-leaderboard', 'game_history', self.events)
+            db.set_page_data('pool-leaderboard', 'game_tombstones', [])
+            db.set_page_data('pool-leaderboard', 'game_sequence', {'next_game_id': self.next_id})
+        if registry:
+            db.set_page_data('pool-leaderboard', 'player_registry', self.registry)
+        if checkpoints:
+            db.set_page_data('pool-leaderboard', 'rating_checkpoints', self.checkpoints)
     
-    return jsonify({
-        'players': player_list,
-        'total_players': len(player_list),
-        'last_updated': datetime.now().isoformat()
-    })
+    def registered_players(self):
+        """Registry entries of every player ever added, including removed ones"""
+        with self._lock:
+            self._ensure_loaded()
+            return {name: dict(entry) for name, entry in self.registry.items()}
+    
+    def active_players(self):
+        """Projected state of every active player"""
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                name: dict(data) for name, data in self.state.items()
+                if self.registry[name]['active']
+            }
+    
+    def games(self):
+        """Game events (resets excluded), oldest first"""
+        with self._lock:
+            self._ensure_loaded()
+            return [
+                event for event in self.events
+                if event.get('type') != 'reset' and event['id'] not in self.tombstones
+            ]
+    
+    def find_game(self, game_id):
+        """Game event with the given id, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            position = self.positions.get(game_id)
+            if position is None or game_id in self.tombstones:
+                return None
+            event = self.events[position]
+            return event if event.get('type') != 'reset' else None
+    
+    def record_game(self, winner, loser, margin='close'):
+        """Apply a new game at the end of the log; returns its record"""
+        with self._lock:
+            self._ensure_loaded()
+            game_record = PoolEloSystem.apply_game(self.state, winner, loser, margin, game_id=self._take_id())
+            self.positions[game_record['id']] = len(self.events)
+            self.events.append(game_record)
+            
+            db = get_db()
+            db.set_page_data('pool-leaderboard', 'players', self.active_players())
+            db.append_to_page_collection('pool-leaderboard', 'game_history', game_record)
+            if self._checkpoint():
+                db.set_page_data('pool-leaderboard', 'rating_checkpoints', self.checkpoints)
+            return game_record
+    
+    def import_games(self, events, players=None):
+        """
+        Merge back-dated game events into the log and replay from the earliest one.
+        Events get new ids. `players` maps names of new or reactivated players to their
+        registry entries.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            self.registry.update(players or {})
+            for event in events:
+                event['id'] = self._take_id()
+            
+            # Positions shift, so start from a log without tombstones
+            self._compact()
+            self.events.extend(events)
+            self.events.sort(key=event_time)
+            self._index_events()
+            
+            earliest = min(event_time(event) for event in events)
+            self._replay(bisect.bisect_left(self.events, earliest, key=event_time))
+            self._save(registry=bool(players))
+    
+    def delete_game(self, game_id):
+        """
+        Tombstone a game and replay everything after it.
+        Returns the game and the names of players whose state was replayed, or (None, []).
+        """
+        with self._lock:
+            game = self.find_game(game_id)
+            if game is None:
+                return None, []
+            
+            position = self.positions[game_id]
+            self.tombstones.add(game_id)
+            self._replay(position)
+            
+            changed = {game['winner'], game['loser']}
+            for event in itertools.islice(self.events, position, None):
+                if 'winner' in event and event['id'] not in self.tombstones:
+                    changed.update((event['winner'], event['loser']))
+            
+            if len(self.tombstones) >= COMPACT_TOMBSTONES:
+                self._save()
+            else:
+                db = get_db()
+                db.append_to_page_collection('pool-leaderboard', 'game_tombstones', game_id)
+                self._save(history=False)
+            return game, sorted(changed)
+    
+    def reset(self, rating=RESET_RATING):
+        """Append a reset event: every existing player restarts at `rating`"""
+        with self._lock:
+            self._ensure_loaded()
+            now = datetime.now()
+            event = {'id': self._take_id(), 'type': 'reset', 'rating': rating, 'timestamp': now.isoformat()}
+            self.positions[event['id']] = len(self.events)
+            self.events.append(event)
+            self._apply(self.state, event)
+            self._checkpoint()
+            self._save()
+    
+    def set_registry(self, registry):
+        """Start over from a new roster with no history (initial data setup)"""
+        with self._lock:
+            self.registry = registry
+            self.events = []
+            self.checkpoints = []
+            self.positions = {}
+            self.tombstones = set()
+            self.state = {name: self._initial_state(name) for name in registry}
+            self._loaded = True
+            self._save(registry=True)
+    
+    def add_player(self, name, initial_rating=DEFAULT_RATING):
+        """Register a new player, or reactivate a removed one with their projected rating"""
+        with self._lock:
+            self._ensure_loaded()
+            if name in self.registry:
+                self.registry[name]['active'] = True
+            else:
+                created = datetime.now().isoformat()
+                self.registry[name] = {
+                    'initial': new_player(initial_rating, created),
+                    'created': created,
+                    'active': True
+                }
+                self.state[name] = self._initial_state(name)
+            self._save(history=False, registry=True, checkpoints=False)
+            return dict(self.state[name])
+    
+    def remove_player(self, name):
+        """Hide a player; their games stay in the log and keep counting for opponents"""
+        with self._lock:
+            self._ensure_loaded()
+            self.registry[name]['active'] = False
+            self._save(history=False, registry=True, checkpoints=False)
+            return dict(self.state[name])
+    
+    def rebuild(self):
+        """Replay the whole log from the registry's starting states, discarding checkpoints"""
+        with self._lock:
+            self._ensure_loaded()
+            self._compact()
+            self.checkpoints = []
+            replayed = self._replay(0)
+            self._save()
+            return replayed
+
+def simulate_ratings(players, games, runs, margin_weights=None, seed=None):
+    """
+    Monte Carlo rating trajectories: `runs` independent futures of `games` games each,
+    with random pairings and results drawn from the ELO expected scores.
+    All runs advance together as NumPy arrays, so cost grows with `games`, not `runs`.
+    """
+    names = list(players)
+    count = len(names)
+    rng = np.random.default_rng(seed)
+    
+    ratings = np.tile(np.array([players[name]['rating'] for name in names], dtype=float), (runs, 1))
+    games_played = np.tile(np.array([players[name]['games_played'] for name in names]), (runs, 1))
+    
+    margins = list(margin_weights or {'close': 1})
+    weights = np.array([(margin_weights or {'close': 1})[margin] for margin in margins], dtype=float)
+    multipliers = np.array([MARGIN_MULTIPLIERS[margin] for margin in margins])
+    
+    rows = np.arange(runs)
+    sample_steps = set(np.linspace(0, games, min(games, TRAJECTORY_POINTS) + 1).astype(int).tolist())
+    trajectory = []
+    
+    for step in range(games + 1):
+        if step in sample_steps:
+            low, median, high = np.percentile(ratings, [10, 50, 90], axis=0)
+            trajectory.append({
+                'game': step,
+                'p10': np.rint(low).tolist(),
+                'median': np.rint(median).tolist(),
+                'p90': np.rint(high).tolist()
+            })
+        if step == games:
+            break
+        
+        # Random distinct pairing in every run
+        first = rng.integers(0, count, runs)
+        second = (first + rng.integers(1, count, runs)) % count
+        
+        first_rating = ratings[rows, first]
+        second_rating = ratings[rows, second]
+        first_expected = 1 / (1 + 10 ** ((second_rating - first_rating) / 400))
+        first_wins = rng.random(runs) < first_expected
+        
+        winner = np.where(first_wins, first, second)
+        loser = np.where(first_wins, second, first)
+        winner_rating = np.where(first_wins, first_rating, second_rating)
+        loser_rating = np.where(first_wins, second_rating, first_rating)
+        winner_expected = np.where(first_wins, first_expected, 1 - first_expected)
+        
+        margin_multiplier = multipliers[rng.choice(len(margins), runs, p=weights / weights.sum())]
+        winner_k = PoolEloSystem.k_factor_array(games_played[rows, winner], winner_rating, True)
+        loser_k = PoolEloSystem.k_factor_array(games_played[rows, loser], loser_rating, False)
+        
+        ratings[rows, winner] += np.rint(winner_k * margin_multiplier * (1 - winner_expected))
+        ratings[rows, loser] += np.rint(loser_k * margin_multiplier * (0 - (1 - winner_expected)))
+        games_played[rows, winner] += 1
+        games_played[rows, loser] += 1
+    
+    # Rank 1 is the highest final rating in a run
+    ranks = count - np.argsort(np.argsort(ratings, axis=1), axis=1)
+    return {
+        'players': names,
+        'runs': runs,
+        'games': games,
+        'final': [
+            {
+                'name': name,
+                'current_rating': players[name]['rating'],
+                'mean_rating': round(float(ratings[:, index].mean()), 1),
+                'p10': float(np.percentile(ratings[:, index], 10)),
+                'p90': float(np.percentile(ratings[:, index], 90)),
+                'mean_rank': round(float(ranks[:, index].mean()), 2),
+                'first_place_probability': round(float((ranks[:, index] == 1).mean()), 4)
+            }
+            for index, name in enumerate(names)
+        ],
+        'trajectory': trajectory
+    }
+
+class LeaderboardView:
+    """
+    Materialized leaderboard kept in memory and updated incrementally on every write.
+    Serialized responses are cached with an ETag, so unchanged polls are answered
+    without touching disk or re-serializing.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.entries = {}   # name -> player data with 'name' and 'win_rate'
+        self.ranking = []   # sorted (-rating, order, name) keys, highest rating first
+        self.orders = {}    # name -> insertion order, keeps ties in roster order
+        self.rating_sum = 0  # running aggregates over self.entries
+        self.histogram = {}  # bucket start -> players with a rating in the bucket
+        self.games = []     # game history, oldest first
+        self.player_games = {}  # name -> that player's games, oldest first
+        self.pair_games = {}    # (name, name) sorted -> games between the two, oldest first
+        self.pair_wins = {}     # (name, name) sorted -> {name: wins}
+        self.rating_series = {}  # name -> (array of epoch seconds, array of ratings), oldest first
+        self._stale_series = set()  # names whose series must be rebuilt after a deletion
+        self.last_updated = None
+        self._order = itertools.count()
+        self._responses = {}  # response name -> (payload, body, etag)
+    
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.replace(rating_projection.active_players(), rating_projection.games())
+    
+    def writing(self):
+        """
+        Lock to hold across a projection write and the view update that follows it,
+        so concurrent writes reach the view in the order they reached the log.
+        Taken before the projection's lock, the same order loading uses.
+        """
+        return self._lock
+    
+    def replace(self, players, games):
+        """Rebuild the whole view (initial load, reset, re-initialization)"""
+        with self._lock:
+            self.entries = {}
+            self.ranking = []
+            self.orders = {}
+            self.rating_sum = 0
+            self.histogram = {}
+            for name, data in players.items():
+                self._set_player(name, data)
+            self.games = sorted(games, key=lambda g: g.get('timestamp', ''))
+            self._reindex()
+            self._loaded = True
+            self._touch('players', 'recent_games', 'stats', 'sparklines')
+    
+    def _count_rating(self, rating, delta):
+        self.rating_sum += rating * delta
+        bucket = rating // HISTOGRAM_BUCKET_SIZE * HISTOGRAM_BUCKET_SIZE
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + delta
+        if not self.histogram[bucket]:
+            del self.histogram[bucket]
+    
+    def _set_player(self, name, data):
+        if name in self.entries:
+            old_key = (-self.entries[name]['rating'], self.orders[name], name)
+            del self.ranking[bisect.bisect_left(self.ranking, old_key)]
+            self._count_rating(self.entries[name]['rating'], -1)
+        elif name not in self.orders:
+            self.orders[name] = next(self._order)
+        
+        entry = dict(data)
+        entry['name'] = name
+        if entry['games_played'] > 0:
+            entry['win_rate'] = round((entry['wins'] / entry['games_played']) * 100, 1)
+        else:
+            entry['win_rate'] = 0.0
+        
+        self.entries[name] = entry
+        bisect.insort(self.ranking, (-entry['rating'], self.orders[name], name))
+        self._count_rating(entry['rating'], 1)
+    
+    def set_player(self, name, data):
+        """Add or update a player after a write"""
+        with self._lock:
+            self._ensure_loaded()
+            self._set_player(name, data)
+            self._touch('players', 'stats', 'sparklines')
+    
+    def remove_player(self, name):
+        """Drop a player after a write"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self.entries.pop(name, None)
+            if entry is not None:
+                key = (-entry['rating'], self.orders.pop(name), name)
+                del self.ranking[bisect.bisect_left(self.ranking, key)]
+                self._count_rating(entry['rating'], -1)
+            self._touch('players', 'stats', 'sparklines')
+    
+    def add_game(self, game):
+        """Record a new game after a write"""
+        with self._lock:
+            if not self._loaded:
+                # Loading reads the history this game was just appended to
+                self._ensure_loaded()
+                return
+            self.games.append(game)
+            if len(self.games) > 1 and self.games[-2].get('timestamp', '') > game.get('timestamp', ''):
+                self.games.sort(key=lambda g: g.get('timestamp', ''))
+                self._reindex()
+            else:
+                self._index_game(game)
+            self._touch('recent_games', 'sparklines')
+    
+    def remove_game(self, game, changed, players):
+        """
+        Drop a deleted game and refresh the players whose ratings were replayed
+        (`changed` names; `players` holds the active ones' new data)
+        """
+        with self._lock:
+            if not self._loaded:
+                # Loading reads the projection, which already excludes the game
+                self._ensure_loaded()
+                return
+            
+            pair = tuple(sorted((game['winner'], game['loser'])))
+            for games in (self.games, self.player_games.get(game['winner']),
+                          self.player_games.get(game['loser']), self.pair_games.get(pair)):
+                self._discard(games or [], game)
+            if pair in self.pair_wins:
+                self.pair_wins[pair][game['winner']] -= 1
+            
+            for name, data in players.items():
+                self._set_player(name, data)
+            self._stale_series.update(changed)
+            # Later games' rating fields were recalculated in place
+            self._touch('players', 'recent_games', 'stats', 'sparklines')
+    
+    @staticmethod
+    def _discard(games, game):
+        """Remove `game` (by identity) from a timestamp-sorted list"""
+        index = bisect.bisect_left(games, game.get('timestamp', ''), key=lambda g: g.get('timestamp', ''))
+        while index < len(games) and games[index] is not game:
+            index += 1
+        if index < len(games):
+            del games[index]
+    
+    def _reindex(self):
+        self.player_games = {}
+        self.pair_games = {}
+        self.pair_wins = {}
+        self.rating_series = {}
+        self._stale_series = set()
+        for game in self.games:
+            self._index_game(game)
+    
+    def _index_game(self, game):
+        winner, loser = game['winner'], game['loser']
+        pair = tuple(sorted((winner, loser)))
+        self.player_games.setdefault(winner, []).append(game)
+        self.player_games.setdefault(loser, []).append(game)
+        self.pair_games.setdefault(pair, []).append(game)
+        wins = self.pair_wins.setdefault(pair, dict.fromkeys(pair, 0))
+        wins[winner] += 1
+        
+        played_at = datetime.fromisoformat(game['timestamp']).timestamp()
+        for role in ('winner', 'loser'):
+            self._append_rating(game[role], played_at, game[f'{role}_rating_before'], game[f'{role}_rating_after'])
+    
+    def _append_rating(self, name, played_at, before, after):
+        # Doubles, so ratings stored by older data or imports as floats still index
+        times, ratings = self.rating_series.setdefault(name, (array('d'), array('d')))
+        if not ratings or ratings[-1] != before:
+            # Starting rating, or a reset between games
+            times.append(played_at)
+            ratings.append(before)
+        times.append(played_at)
+        ratings.append(after)
+    
+    def rating_history(self, name, points=RATING_HISTORY_POINTS):
+        """
+        A player's rating after each game, evenly downsampled to at most `points`
+        (first and last kept). Returns (timestamps, ratings, total points).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if name in self._stale_series:
+                self._stale_series.discard(name)
+                self.rating_series.pop(name, None)
+                for game in self.player_games.get(name, []):
+                    role = 'winner' if game['winner'] == name else 'loser'
+                    played_at = datetime.fromisoformat(game['timestamp']).timestamp()
+                    self._append_rating(name, played_at, game[f'{role}_rating_before'], game[f'{role}_rating_after'])
+            
+            times, ratings = self.rating_series.get(name, ((), ()))
+            total = len(ratings)
+            if total > points:
+                indexes = [round(i * (total - 1) / (points - 1)) for i in range(points)] if points > 1 else [total - 1]
+            else:
+                indexes = range(total)
+            return (
+                [datetime.fromtimestamp(times[i]).isoformat() for i in indexes],
+                [int(ratings[i]) if ratings[i].is_integer() else ratings[i] for i in indexes],
+                total
+            )
+    
+    def games_for(self, name, offset=0, limit=None):
+        """A player's games (newest first) and their total count"""
+        with self._lock:
+            self._ensure_loaded()
+            games = self.player_games.get(name, [])
+            return self._page(games, offset, limit), len(games)
+    
+    def head_to_head(self, a, b, offset=0, limit=None):
+        """Games between two players (newest first), total count, and wins per player"""
+        with self._lock:
+            self._ensure_loaded()
+            pair = tuple(sorted((a, b)))
+            games = self.pair_games.get(pair, [])
+            wins = dict(self.pair_wins.get(pair, dict.fromkeys(pair, 0)))
+            return self._page(games, offset, limit), len(games), wins
+    
+    @staticmethod
+    def _page(games, offset, limit):
+        """Newest-first slice of an oldest-first list, touching only the returned games"""
+        end = len(games) - offset
+        start = max(end - limit, 0) if limit is not None else 0
+        return games[start:max(end, 0)][::-1]
+    
+    def _touch(self, *responses):
+        self.last_updated = datetime.now().isoformat()
+        for name in responses:
+            self._responses.pop(name, None)
+    
+    def _cached(self, name, build_payload):
+        with self._lock:
+            self._ensure_loaded()
+            cached = self._responses.get(name)
+            if cached is None:
+                payload = build_payload()
+                body = json.dumps(payload)
+                etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:20]
+                cached = self._responses[name] = (payload, body, etag)
+            return cached
+    
+    def _players_payload(self):
+        return self._cached('players', lambda: {
+            'players': [self.entries[name] for _, _, name in self.ranking],
+            'total_players': len(self.entries),
+            'last_updated': self.last_updated
+        })
+    
+    def _recent_games_payload(self):
+        return self._cached('recent_games', lambda: {
+            'games': self.games[:-RECENT_GAMES_LIMIT - 1:-1],
+            'total_games': len(self.games)
+        })
+    
+    def _sparklines_payload(self):
+        return self._cached('sparklines', lambda: {
+            'players': [
+                {'name': name, 'ratings': self.rating_history(name, SPARKLINE_POINTS)[1]}
+                for _, _, name in self.ranking
+            ],
+            'points': SPARKLINE_POINTS
+        })
+    
+    def average_rating(self):
+        """Mean rating from the running sum, or None without players"""
+        with self._lock:
+            self._ensure_loaded()
+            return round(self.rating_sum / len(self.entries)) if self.entries else None
+    
+    def _percentile(self, fraction):
+        # self.ranking is sorted highest first, so count from the end
+        index = round(fraction * (len(self.ranking) - 1))
+        return -self.ranking[len(self.ranking) - 1 - index][0]
+    
+    def _stats_payload(self):
+        def build():
+            count = len(self.entries)
+            if not count:
+                return {'total_players': 0, 'average_rating': DEFAULT_RATING, 'histogram': []}
+            return {
+                'total_players': count,
+                'average_rating': round(self.rating_sum / count),
+                'min_rating': -self.ranking[-1][0],
+                'max_rating': -self.ranking[0][0],
+                'percentiles': {
+                    f'p{percent}': self._percentile(percent / 100)
+                    for percent in (10, 25, 50, 75, 90)
+                },
+                'bucket_size': HISTOGRAM_BUCKET_SIZE,
+                'histogram': [
+                    {'from': bucket, 'to': bucket + HISTOGRAM_BUCKET_SIZE, 'count': self.histogram[bucket]}
+                    for bucket in sorted(self.histogram)
+                ]
+            }
+        return self._cached('stats', build)
+    
+    def stats_response(self):
+        """Serialized rating aggregates (average, percentiles, histogram) and their ETag"""
+        return self._stats_payload()[1:]
+    
+    def players_response(self):
+        """Serialized ranked player list and its ETag"""
+        return self._players_payload()[1:]
+    
+    def sparklines_response(self):
+        """Serialized downsampled rating series of every ranked player and its ETag"""
+        return self._sparklines_payload()[1:]
+    
+    def recent_games_response(self):
+        """Serialized most recent games (newest first) and their ETag"""
+        return self._recent_games_payload()[1:]
+    
+    def snapshot(self):
+        """Players and recent games in one payload, for newly connected live clients"""
+        with self._lock:
+            return dict(self._players_payload()[0], **self._recent_games_payload()[0])
+    
+    def get_entries(self, *names):
+        """Current leaderboard entries for the given players (for pushing deltas)"""
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(self.entries[name]) for name in names if name in self.entries]
+
+
+rating_projection = RatingProjection()
+leaderboard_view = LeaderboardView()
+
+
+def push_leaderboard_event(event, data):
+    """Push an update to every connected leaderboard client (no-op without Socket.IO)"""
+    socketio = current_app.extensions.get('socketio')
+    if socketio is not None:
+        socketio.emit(event, data, namespace=LEADERBOARD_NAMESPACE)
+
+
+class IdempotencyCache:
+    """
+    Bounded table of write responses by idempotency key. Entries expire after a TTL
+    and the oldest are evicted beyond `max_keys`, so a retried write is answered
+    from the stored response without being applied again.
+    """
+    
+    def __init__(self, max_keys=IDEMPOTENCY_MAX_KEYS, ttl_seconds=IDEMPOTENCY_TTL_SECONDS):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> entry, oldest first
+    
+    def _evict(self, now):
+        # Entries are in creation order, so expired ones are always at the front
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if len(self._entries) < self.max_keys and now - entry['created'] <= self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+    
+    def claim(self, key, fingerprint):
+        """Return (entry, True) for a new key, or the existing entry and False"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and now - entry['created'] <= self.ttl_seconds:
+                return entry, False
+            self._entries.pop(key, None)
+            self._evict(now)
+            entry = self._entries[key] = {
+                'fingerprint': fingerprint,
+                'created': now,
+                'done': threading.Event(),
+                'response': None
+            }
+            return entry, True
+    
+    def complete(self, key, entry, response):
+        """Store the (body, status, mimetype) for a key; None forgets it so a retry runs again"""
+        with self._lock:
+            entry['response'] = response
+            if response is None and self._entries.get(key) is entry:
+                del self._entries[key]
+        entry['done'].set()
+    
+    def get_stats(self):
+        with self._lock:
+            return {'keys': len(self._entries), 'max_keys': self.max_keys, 'ttl_seconds': self.ttl_seconds}
+
+
+idempotency_cache = IdempotencyCache()
+
+
+def idempotent(view):
+    """
+    Deduplicate a write endpoint by the request's Idempotency-Key header: a retry
+    with the same key gets the first response replayed (or waits for it while the
+    first request is still running). Requests without a key run normally.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 200:
+            return jsonify({'error': 'Idempotency-Key is too long'}), 400
+        
+        cache_key = (request.path, key)
+        fingerprint = hashlib.sha1(request.get_data()).hexdigest()
+        entry, owner = idempotency_cache.claim(cache_key, fingerprint)
+        
+        if not owner:
+            if entry['fingerprint'] != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+            if not entry['done'].wait(IDEMPOTENCY_WAIT_SECONDS) or entry['response'] is None:
+                return jsonify({'error': 'The original request with this Idempotency-Key did not complete'}), 409
+            body, status, mimetype = entry['response']
+            response = Response(body, status=status, mimetype=mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency_cache.complete(cache_key, entry, None)
+            raise
+        
+        # Server errors are not stored, so the client's retry runs the write again
+        stored = None
+        if response.status_code < 500:
+            stored = (response.get_data(), response.status_code, response.mimetype)
+        idempotency_cache.complete(cache_key, entry, stored)
+        return response
+    return wrapper
+
+
+def etag_response(body, etag):
+    """JSON response that answers If-None-Match with 304 Not Modified"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/players')
+def get_players():
+    """Get all players sorted by ELO rating"""
+    return etag_response(*leaderboard_view.players_response())
 
 @bp.route('/authenticate', methods=['POST'])
 def authenticate():
@@ -110,6 +1102,7 @@ def authenticate():
     })
 
 @bp.route('/record-game', methods=['POST'])
+@idempotent
 def record_game():
     """Record a new game result"""
     data = request.get_json()
@@ -128,78 +1121,23 @@ def record_game():
     if winner == loser:
         return jsonify({'error': 'Winner and loser cannot be the same'}), 400
     
-    db = get_db()
-    players = db.get_page_data('pool-leaderboard', 'players', {})
-    
-    if winner not in players or loser not in players:
-        return jsonify({'error': 'One or both players not found'}), 404
-    
-    # Calculate ELO changes
-    winner_rating = players[winner]['rating']
-    loser_rating = players[loser]['rating']
-    
-    # Expected scores
-    winner_expected = PoolEloSystem.calculate_expected_score(winner_rating, loser_rating)
-    loser_expected = PoolEloSystem.calculate_expected_score(loser_rating, winner_rating)
-    
-    # Margin adjustments
-    margin_multiplier = {
-        'close': 1.0,
-        'comfortable': 1.1,
-        'decisive': 1.2
-    }.get(margin, 1.0)
-    
-    # K-factors with activity boost
-    winner_k = PoolEloSystem.calculate_k_factor(
-        players[winner]['games_played'], 
-        winner_rating, 
-        True, 
-        players[winner].get('last_played')
-    )
-    loser_k = PoolEloSystem.calculate_k_factor(
-        players[loser]['games_played'], 
-        loser_rating, 
-        False, 
-        players[loser].get('last_played')
-    )
-    
-    # Rating changes
-    winner_change = winner_k * margin_multiplier * (1 - winner_expected)
-    loser_change = loser_k * margin_multiplier * (0 - loser_expected)
-    
-    # Update player data
-    old_winner_rating = players[winner]['rating']
-    old_loser_rating = players[loser]['rating']
-    
-    players[winner]['rating'] += round(winner_change)
-    players[winner]['games_played'] += 1
-    players[winner]['wins'] += 1
-    players[winner]['last_played'] = datetime.now().isoformat()
-    
-    players[loser]['rating'] += round(loser_change)
-    players[loser]['games_played'] += 1
-    players[loser]['losses'] += 1
-    players[loser]['last_played'] = datetime.now().isoformat()
-    
-    # Save updated data
-    db.set_page_data('pool-leaderboard', 'players', players)
-    
-    # Record game history
-    game_record = {
-        'id': datetime.now().timestamp(),
-        'winner': winner,
-        'loser': loser,
-        'margin': margin,
-        'winner_rating_before': old_winner_rating,
-        'loser_rating_before': old_loser_rating,
-        'winner_rating_after': players[winner]['rating'],
-        'loser_rating_after': players[loser]['rating'],
-        'winner_change': round(winner_change),
-        'loser_change': round(loser_change),
-        'timestamp': datetime.now().isoformat()
-    }
-    
-    db.append_to_page_collection('pool-leaderboard', 'game_history', game_record)
+    with leaderboard_view.writing():
+        players = rating_projection.active_players()
+        
+        if winner not in players or loser not in players:
+            return jsonify({'error': 'One or both players not found'}), 404
+        
+        # Apply the game and append it to the history log
+        game_record = rating_projection.record_game(winner, loser, margin)
+        players = rating_projection.active_players()
+        
+        leaderboard_view.set_player(winner, players[winner])
+        leaderboard_view.set_player(loser, players[loser])
+        leaderboard_view.add_game(game_record)
+        push_leaderboard_event('game_recorded', {
+            'game': game_record,
+            'players': leaderboard_view.get_entries(winner, loser)
+        })
     
     return jsonify({
         'success': True,
@@ -208,43 +1146,236 @@ def record_game():
         'loser_new_rating': players[loser]['rating']
     })
 
+def parse_import_games(text, fmt='jsonl'):
+    """Parse CSV (with a header row) or JSON Lines game records into dicts"""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(text)))
+    
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def normalize_import_game(row):
+    """Validate one imported game row, returning {winner, loser, margin, played_at}"""
+    if not isinstance(row, dict):
+        raise ValueError('game must be an object')
+    
+    winner = str(row.get('winner') or '').strip().lower()
+    loser = str(row.get('loser') or '').strip().lower()
+    if not winner or not loser:
+        raise ValueError('winner and loser are required')
+    if winner == loser:
+        raise ValueError('winner and loser cannot be the same')
+    
+    margin = str(row.get('margin') or 'close').strip().lower()
+    if margin not in MARGIN_MULTIPLIERS:
+        raise ValueError(f"margin must be one of: {', '.join(MARGIN_MULTIPLIERS)}")
+    
+    timestamp = row.get('timestamp')
+    try:
+        if timestamp and timestamp.endswith('Z'):
+            timestamp = timestamp[:-1] + '+00:00'
+        played_at = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"invalid timestamp {row.get('timestamp')!r}")
+    
+    # History timestamps are naive local time, like datetime.now()
+    if played_at.tzinfo is not None:
+        played_at = played_at.astimezone().replace(tzinfo=None)
+    
+    return {'winner': winner, 'loser': loser, 'margin': margin, 'played_at': played_at}
+
+
+def import_games(rows, create_missing=False):
+    """
+    Validate many games, merge them into the history log and replay ratings from the
+    earliest imported game in one chronological pass, writing once.
+    All-or-nothing: any invalid row aborts. Returns (summary, errors).
+    """
+    games = []
+    errors = []
+    for line_number, row in enumerate(rows, start=1):
+        try:
+            games.append(normalize_import_game(row))
+        except ValueError as e:
+            errors.append({'row': line_number, 'error': str(e)})
+    
+    games.sort(key=lambda game: game['played_at'])
+    
+    registry = rating_projection.registered_players()
+    new_players = {}
+    reactivated = []
+    missing = set()
+    for game in games:
+        for name in (game['winner'], game['loser']):
+            if (name in registry and registry[name]['active']) or name in new_players or name in missing:
+                continue
+            if not create_missing:
+                errors.append({'row': None, 'error': f'Player {name} not found'})
+                missing.add(name)
+                continue
+            if name in registry:
+                # A removed player keeps their starting state, so their old games replay unchanged
+                new_players[name] = dict(registry[name], active=True)
+                reactivated.append(name)
+                continue
+            created = game['played_at'].isoformat()
+            new_players[name] = {'initial': new_player(created=created), 'created': created, 'active': True}
+    
+    if errors:
+        return None, errors
+    
+    events = [
+        {
+            'winner': game['winner'],
+            'loser': game['loser'],
+            'margin': game['margin'],
+            'timestamp': game['played_at'].isoformat()
+        }
+        for game in games
+    ]
+    with leaderboard_view.writing():
+        rating_projection.import_games(events, new_players)
+        leaderboard_view.replace(rating_projection.active_players(), rating_projection.games())
+    
+    return {
+        'games_imported': len(events),
+        'players_created': [name for name in new_players if name not in reactivated],
+        'players_reactivated': reactivated,
+        'total_games': len(rating_projection.games())
+    }, []
+
+
+@bp.route('/import-games', methods=['POST'])
+@idempotent
+def import_games_endpoint():
+    """
+    Bulk import games. Accepts JSON {"games": [...]} or {"format": "csv"|"jsonl", "data": "..."},
+    or a raw text/csv or application/x-ndjson body. Add ?create_missing=1 to create unknown players.
+    """
+    data = request.get_json(silent=True)
+    create_missing = request.args.get('create_missing') in ('1', 'true')
+    
+    try:
+        if isinstance(data, dict) and isinstance(data.get('games'), list):
+            rows = data['games']
+            create_missing = create_missing or bool(data.get('create_missing'))
+        elif isinstance(data, dict) and 'data' in data:
+            rows = parse_import_games(data['data'], data.get('format', 'jsonl'))
+            create_missing = create_missing or bool(data.get('create_missing'))
+        else:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'jsonl'
+            rows = parse_import_games(request.get_data(as_text=True), fmt)
+    except (ValueError, csv.Error) as e:
+        return jsonify({'error': f'Could not parse games: {e}'}), 400
+    
+    if not rows:
+        return jsonify({'error': 'No games provided'}), 400
+    
+    summary, errors = import_games(rows, create_missing)
+    if errors:
+        return jsonify({'error': 'Import rejected', 'errors': errors[:50], 'total_errors': len(errors)}), 400
+    
+    push_leaderboard_event('leaderboard_snapshot', leaderboard_view.snapshot())
+    
+    return jsonify(dict(summary, success=True))
+
 @bp.route('/recent-games')
 def recent_games():
-    """Get recent game history"""
-    db = get_db()
-    games = db.get_page_data('pool-leaderboard', 'game_history', [])
+    """Get recent game history (most recent first, limited to 20)"""
+    return etag_response(*leaderboard_view.recent_games_response())
+
+def page_params():
+    """offset and limit query parameters for paged history endpoints"""
+    offset = max(int(request.args.get('offset', 0)), 0)
+    limit = min(max(int(request.args.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+    return offset, limit
+
+@bp.route('/player/<name>/games')
+def player_games(name):
+    """A player's games, most recent first (?offset=0&limit=50)"""
+    name = name.strip().lower()
+    try:
+        offset, limit = page_params()
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
     
-    # Sort by timestamp (most recent first) and limit to 20
-    games.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-    recent_games = games[:20]
+    games, total = leaderboard_view.games_for(name, offset, limit)
+    if not total and name not in rating_projection.active_players():
+        return jsonify({'error': 'Player not found'}), 404
     
     return jsonify({
-        'games': recent_games,
-        'total_games': len(games)
+        'player': name,
+        'games': games,
+        'total_games': total,
+        'offset': offset,
+        'limit': limit
     })
 
-@bp.route('/reset-data', methods=['POST'])
-def reset_data():
-    """Reset all current players to 1000 ELO"""
-    db = get_db()
+@bp.route('/sparklines')
+def sparklines():
+    """Every player's rating series downsampled for the leaderboard trend column, in rank order"""
+    return etag_response(*leaderboard_view.sparklines_response())
+
+@bp.route('/player/<name>/rating-history')
+def rating_history(name):
+    """A player's rating over time for charts, downsampled (?points=50)"""
+    name = name.strip().lower()
+    try:
+        points = min(max(int(request.args.get('points', RATING_HISTORY_POINTS)), 1), MAX_RATING_HISTORY_POINTS)
+    except ValueError:
+        return jsonify({'error': 'points must be an integer'}), 400
     
-    # Get current players and reset their ratings to 1000
-    current_players = db.get_page_data('pool-leaderboard', 'players', {})
-    
-    # Reset all current players to 1000 ELO, keeping their created dates
-    for player_name, player_data in current_players.items():
-        current_players[player_name] = {
-            "rating": 1000,
-            "games_played": 0,
-            "wins": 0,
-            "losses": 0,
-            "created": player_data.get('created', datetime.now().isoformat()),
-            "last_played": None
-        }
+    player = leaderboard_view.get_entries(name)
+    timestamps, ratings, total = leaderboard_view.rating_history(name, points)
+    if not player and not total:
+        return jsonify({'error': 'Player not found'}), 404
     
-    # Save to database
-    db.set_page_data('pool-leaderboard', 'players', current_players)
-    db.set_page_data('pool-leaderboard', 'game_history', [])
+    return jsonify({
+        'player': name,
+        'current_rating': player[0]['rating'] if player else ratings[-1],
+        'timestamps': timestamps,
+        'ratings': ratings,
+        'total_points': total
+    })
+
+@bp.route('/head-to-head/<a>/<b>')
+def head_to_head(a, b):
+    """Head-to-head record and games between two players, most recent first"""
+    a, b = a.strip().lower(), b.strip().lower()
+    if a == b:
+        return jsonify({'error': 'Choose two different players'}), 400
+    try:
+        offset, limit = page_params()
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    games, total, wins = leaderboard_view.head_to_head(a, b, offset, limit)
+    if not total:
+        players = rating_projection.active_players()
+        missing = [name for name in (a, b) if name not in players]
+        if missing:
+            return jsonify({'error': f"Players not found: {', '.join(missing)}"}), 404
+    
+    return jsonify({
+        'players': [a, b],
+        'wins': wins,
+        'total_games': total,
+        'games': games,
+        'offset': offset,
+        'limit': limit
+    })
+
+@bp.route('/reset-data', methods=['POST'])
+@idempotent
+def reset_data():
+    """Reset all current players to 1000 ELO (game history is kept)"""
+    # Record the reset as an event so ratings can still be rebuilt from history
+    with leaderboard_view.writing():
+        rating_projection.reset(RESET_RATING)
+        current_players = rating_projection.active_players()
+        
+        leaderboard_view.replace(current_players, rating_projection.games())
+        push_leaderboard_event('leaderboard_snapshot', leaderboard_view.snapshot())
     
     return jsonify({
         'success': True,
@@ -253,13 +1384,17 @@ def reset_data():
     })
 
 @bp.route('/init-data', methods=['POST'])
+@idempotent
 def init_data():
     """Initialize pool data from existing system (one-time setup)"""
     db = get_db()
     
-    # Check if data already exists
+    # Check if data already exists; the game log is the source of truth even
+    # when every player has been removed
     existing_players = db.get_page_data('pool-leaderboard', 'players', {})
-    if existing_players:
+    registry = db.get_page_data('pool-leaderboard', 'player_registry', {})
+    history = db.get_page_data('pool-leaderboard', 'game_history', [])
+    if existing_players or registry or history:
         return jsonify({'error': 'Data already initialized'}), 400
     
     # Initial player data from the existing pool system
@@ -307,8 +1442,13 @@ def init_data():
     }
     
     # Save to database
-    db.set_page_data('pool-leaderboard', 'players', initial_players)
-    db.set_page_data('pool-leaderboard', 'game_history', [])
+    with leaderboard_view.writing():
+        rating_projection.set_registry({
+            name: {'initial': data, 'created': data['created'], 'active': True}
+            for name, data in initial_players.items()
+        })
+        leaderboard_view.replace(initial_players, [])
+        push_leaderboard_event('leaderboard_snapshot', leaderboard_view.snapshot())
     
     return jsonify({
         'success': True,
@@ -317,6 +1457,7 @@ def init_data():
     })
 
 @bp.route('/add-player', methods=['POST'])
+@idempotent
 def add_player():
     """Add a new player to the system"""
     data = request.get_json()
@@ -327,32 +1468,29 @@ def add_player():
     if not name:
         return jsonify({'error': 'Name cannot be empty'}), 400
     
-    db = get_db()
-    players = db.get_page_data('pool-leaderboard', 'players', {})
-    
-    if name in players:
-        return jsonify({'error': 'Player already exists'}), 400
-    
-    # Add new player with default rating
-    initial_rating = data.get('initial_rating', 1200)
-    players[name] = {
-        "rating": initial_rating,
-        "games_played": 0,
-        "wins": 0,
-        "losses": 0,
-        "created": datetime.now().isoformat(),
-        "last_played": None
-    }
+    # Add new player with default rating (a removed player comes back with their rating)
+    initial_rating = data.get('initial_rating', DEFAULT_RATING)
+    if isinstance(initial_rating, float) and initial_rating.is_integer():
+        initial_rating = int(initial_rating)
+    if not isinstance(initial_rating, int) or isinstance(initial_rating, bool):
+        return jsonify({'error': 'initial_rating must be a whole number'}), 400
     
-    db.set_page_data('pool-leaderboard', 'players', players)
+    with leaderboard_view.writing():
+        if name in rating_projection.active_players():
+            return jsonify({'error': 'Player already exists'}), 400
+        
+        player = rating_projection.add_player(name, initial_rating)
+        leaderboard_view.set_player(name, player)
+        push_leaderboard_event('rating_update', {'players': leaderboard_view.get_entries(name), 'removed': []})
     
     return jsonify({
         'success': True,
         'message': f'Player {name} added successfully',
-        'player': players[name]
+        'player': player
     })
 
 @bp.route('/delete-game', methods=['POST'])
+@idempotent
 def delete_game():
     """Delete a recent game (within 20 minutes)"""
     data = request.get_json()
@@ -361,70 +1499,121 @@ def delete_game():
     
     game_id = data['game_id']
     
-    db = get_db()
-    games = db.get_page_data('pool-leaderboard', 'game_history', [])
-    players = db.get_page_data('pool-leaderboard', 'players', {})
-    
-    # Find the game to delete
-    game_to_delete = None
-    for i, game in enumerate(games):
-        if game.get('id') == game_id:
-            # Check if game is within 20 minutes
-            game_time = datetime.fromisoformat(game['timestamp'])
-            time_diff = datetime.now() - game_time
-            if time_diff.total_seconds() > 1200:  # 20 minutes
-                return jsonify({'error': 'Can only delete games within 20 minutes'}), 400
-            
-            game_to_delete = games.pop(i)
-            break
-    
-    if not game_to_delete:
-        return jsonify({'error': 'Game not found'}), 404
-    
-    # Reverse the ELO changes
-    winner = game_to_delete['winner']
-    loser = game_to_delete['loser']
-    
-    if winner in players and loser in players:
-        # Reverse rating changes
-        players[winner]['rating'] = game_to_delete['winner_rating_before']
-        players[winner]['games_played'] -= 1
-        players[winner]['wins'] -= 1
+    with leaderboard_view.writing():
+        # Find the game to delete
+        game = rating_projection.find_game(game_id)
+        if not game:
+            return jsonify({'error': 'Game not found'}), 404
         
-        players[loser]['rating'] = game_to_delete['loser_rating_before']
-        players[loser]['games_played'] -= 1
-        players[loser]['losses'] -= 1
+        # Check if game is within 20 minutes
+        game_time = datetime.fromisoformat(game['timestamp'])
+        time_diff = datetime.now() - game_time
+        if time_diff.total_seconds() > 1200:  # 20 minutes
+            return jsonify({'error': 'Can only delete games within 20 minutes'}), 400
         
-        # Save updated data
-        db.set_page_data('pool-leaderboard', 'players', players)
-        db.set_page_data('pool-leaderboard', 'game_history', games)
+        # Drop it from the log and replay later games from the nearest checkpoint
+        game_to_delete, changed = rating_projection.delete_game(game_id)
+        if not game_to_delete:
+            return jsonify({'error': 'Game not found'}), 404
         
-        return jsonify({
-            'success': True,
-            'message': 'Game deleted and ratings restored',
-            'deleted_game': game_to_delete
-        })
-    else:
-        return jsonify({'error': 'Players not found'}), 404
+        players = rating_projection.active_players()
+        leaderboard_view.remove_game(game_to_delete, changed, {name: players[name] for name in changed if name in players})
+        push_leaderboard_event('leaderboard_snapshot', leaderboard_view.snapshot())
+    
+    return jsonify({
+        'success': True,
+        'message': 'Game deleted and ratings recalculated',
+        'deleted_game': game_to_delete
+    })
 
 @bp.route('/average-rating')
 def get_average_rating():
     """Get the average rating of all players"""
-    db = get_db()
-    players = db.get_page_data('pool-leaderboard', 'players', {})
+    average = leaderboard_view.average_rating()
     
-    if not players:
-        return jsonify({'average_rating': 1200})
-    
-    total_rating = sum(player['rating'] for player in players.values())
-    average = round(total_rating / len(players))
+    if average is None:
+        return jsonify({'average_rating': DEFAULT_RATING})
     
     return jsonify({
         'average_rating': average,
-        'total_players': len(players)
+        'total_players': len(leaderboard_view.entries)
+    })
+
+@bp.route('/stats')
+def get_stats():
+    """Rating distribution: average, min/max, percentiles and a histogram"""
+    return etag_response(*leaderboard_view.stats_response())
+
+def analytics_players():
+    """Active players for the analytics endpoints, optionally limited by ?players=a,b,c"""
+    players = rating_projection.active_players()
+    requested = [name.strip().lower() for name in request.args.get('players', '').split(',') if name.strip()]
+    if requested:
+        missing = [name for name in requested if name not in players]
+        if missing:
+            return None, (jsonify({'error': f"Players not found: {', '.join(missing)}"}), 404)
+        players = {name: players[name] for name in requested}
+    return players, None
+
+@bp.route('/win-probabilities')
+def win_probabilities():
+    """Predicted win probability for every pair of players (row beats column)"""
+    if np is None:
+        return jsonify({'error': 'NumPy is required for analytics'}), 503
+    
+    players, error = analytics_players()
+    if error:
+        return error
+    
+    names = sorted(players, key=lambda name: -players[name]['rating'])
+    matrix = PoolEloSystem.expected_score_matrix([players[name]['rating'] for name in names])
+    
+    return jsonify({
+        'players': names,
+        'ratings': [players[name]['rating'] for name in names],
+        'probabilities': np.round(matrix, 4).tolist()
     })
 
+@bp.route('/simulate')
+def simulate():
+    """
+    Monte Carlo simulation of future games.
+    Query: runs (default 2000), games (default 50), players=a,b,c, seed
+    """
+    if np is None:
+        return jsonify({'error': 'NumPy is required for analytics'}), 503
+    
+    players, error = analytics_players()
+    if error:
+        return error
+    if len(players) < 2:
+        return jsonify({'error': 'At least two players are required'}), 400
+    
+    try:
+        runs = int(request.args.get('runs', 2000))
+        games = int(request.args.get('games', 50))
+        seed = request.args.get('seed')
+        seed = int(seed) if seed is not None else None
+    except ValueError:
+        return jsonify({'error': 'runs, games and seed must be integers'}), 400
+    
+    if not 1 <= runs <= MAX_SIMULATION_RUNS or not 1 <= games <= MAX_SIMULATION_GAMES:
+        return jsonify({
+            'error': f'runs must be 1-{MAX_SIMULATION_RUNS} and games 1-{MAX_SIMULATION_GAMES}'
+        }), 400
+    
+    # Draw game margins with the same frequencies as past games
+    margin_weights = {margin: 0 for margin in MARGIN_MULTIPLIERS}
+    for game in rating_projection.games():
+        if game.get('margin') in margin_weights:
+            margin_weights[game['margin']] += 1
+    if not any(margin_weights.values()):
+        margin_weights = None
+    
+    return jsonify(simulate_ratings(players, games, runs, margin_weights, seed))
+
 @bp.route('/remove-player', methods=['POST'])
+@idempotent
 def remove_player():
     """Remove a player from the system"""
     data = request.get_json()
@@ -435,21 +1624,77 @@ def remove_player():
     if not name:
         return jsonify({'error': 'Name cannot be empty'}), 400
     
-    db = get_db()
-    players = db.get_page_data('pool-leaderboard', 'players', {})
-    
-    if name not in players:
-        return jsonify({'error': 'Player not found'}), 404
-    
-    # Remove player
-    removed_player = players.pop(name)
-    
-    # Save updated data
-    db.set_page_data('pool-leaderboard', 'players', players)
+    with leaderboard_view.writing():
+        players = rating_projection.active_players()
+        
+        if name not in players:
+            return jsonify({'error': 'Player not found'}), 404
+        
+        # Remove player (their games stay in the history log)
+        removed_player = rating_projection.remove_player(name)
+        players.pop(name)
+        
+        leaderboard_view.remove_player(name)
+        push_leaderboard_event('rating_update', {'players': [], 'removed': [name]})
     
     return jsonify({
         'success': True,
         'message': f'Player {name} removed successfully',
         'removed_player': removed_player,
         'remaining_players': len(players)
-    })
\ No newline at end of file
+    })
+
+def register_websocket_handlers(socketio):
+    """Register WebSocket event handlers for live leaderboard updates"""
+    
+    @socketio.on('connect', namespace=LEADERBOARD_NAMESPACE)
+    def on_connect():
+        # Send the current state once; after that clients only receive deltas
+        emit('leaderboard_snapshot', leaderboard_view.snapshot())
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Pool leaderboard maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    import_parser = subparsers.add_parser("import", help="Bulk import games from CSV or JSON Lines")
+    import_parser.add_argument("file", help="Games file (columns/keys: winner, loser, margin, timestamp)")
+    import_parser.add_argument("--format", choices=["jsonl", "csv"], 
+                              help="Input format (default: from file extension)")
+    import_parser.add_argument("--create-missing", action="store_true", 
+                              help="Create players that don't exist yet")
+    
+    subparsers.add_parser("rebuild", help="Recompute all ratings from the game history")
+    
+    args = parser.parse_args()
+    
+    if args.command == "rebuild":
+        started = datetime.now()
+        replayed = rating_projection.rebuild()
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"Replayed {replayed} events for {len(rating_projection.active_players())} players in {elapsed:.2f}s")
+        return
+    
+    fmt = args.format or ('csv' if args.file.endswith('.csv') else 'jsonl')
+    with open(args.file, 'r', encoding='utf-8') as f:
+        rows = parse_import_games(f.read(), fmt)
+    
+    started = datetime.now()
+    summary, errors = import_games(rows, args.create_missing)
+    if errors:
+        for error in errors[:20]:
+            print(f"Row {error['row']}: {error['error']}" if error['row'] else error['error'])
+        print(f"Import rejected ({len(errors)} errors)")
+        raise SystemExit(1)
+    
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Imported {summary['games_imported']} games in {elapsed:.2f}s")
+    if summary['players_created']:
+        print(f"Created players: {', '.join(summary['players_created'])}")
+    if summary['players_reactivated']:
+        print(f"Reactivated players: {', '.join(summary['players_reactivated'])}")
+
+if __name__ == "__main__":
+    main()
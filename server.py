@@ -5,6 +5,54 @@ import os
 import sys
 from pathlib import Path
 
+# compile.py writes these next to HTML/CSS/JS outputs, preferred in this order
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows (q=0 excluded)"""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class PrecompressedHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler that sends compile.py's .br/.gz siblings to clients that accept them"""
+    
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Let the base class redirect /page to /page/; serve /page/ as its index.html
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return super().send_head()
+            path = os.path.join(path, 'index.html')
+        
+        if os.path.isfile(path):
+            accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                sibling = path + suffix
+                if (encoding in accepted and os.path.isfile(sibling)
+                        and os.stat(sibling).st_mtime_ns >= os.stat(path).st_mtime_ns):
+                    f = open(sibling, 'rb')
+                    stat = os.fstat(f.fileno())
+                    self.send_response(200)
+                    self.send_header("Content-type", self.guess_type(path))
+                    self.send_header("Content-Encoding", encoding)
+                    self.send_header("Content-Length", str(stat.st_size))
+                    self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
+                    self.send_header("Vary", "Accept-Encoding")
+                    self.end_headers()
+                    return f
+        return super().send_head()
+
 class BlogServer:
     def __init__(self, port=8000, directory="output"):
         self.port = port
@@ -21,7 +69,7 @@ class BlogServer:
         os.chdir(self.directory)
         
         # Create server
-        handler = http.server.SimpleHTTPRequestHandler
+        handler = PrecompressedHandler
         
         try:
             with socketserver.TCPServer(("", self.port), handler) as httpd:
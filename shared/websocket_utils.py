@@ -3,8 +3,15 @@ WebSocket utilities for real-time features and game development.
 Provides common patterns and helpers for WebSocket integration.
 """
 
+from flask import request
 from flask_socketio import emit, join_room, leave_room, disconnect
+from shared.database import get_db
+from collections import OrderedDict
 from datetime import datetime
+from functools import wraps
+import itertools
+import threading
+import time
 import uuid
 import json
 
@@ -24,6 +31,13 @@ class WebSocketRoom:
     
     def add_player(self, player_id, player_data=None):
         """Add a player to the room"""
+        if self.is_restored_player(player_id):
+            # Player from a warm-restart snapshot reconnecting - reclaim their slot
+            player = self.players[player_id]
+            player.pop('restored', None)
+            player['data'] = player_data or player['data']
+            return True, "Player reconnected"
+        
         if len(self.players) >= self.max_players:
             return False, "Room is full"
         
@@ -45,6 +59,11 @@ class WebSocketRoom:
             return True
         return False
     
+    def is_restored_player(self, player_id):
+        """Check if a player was restored from a snapshot and has not reconnected yet"""
+        player = self.players.get(player_id)
+        return bool(player and player.get('restored'))
+    
     def get_player_count(self):
         """Get current number of players"""
         return len(self.players)
@@ -64,15 +83,48 @@ class WebSocketRoom:
             'created_at': self.created_at.isoformat(),
             'data': self.data
         }
+    
+    def to_snapshot(self):
+        """Full room state (including player records) for persistence"""
+        return {
+            'room_id': self.room_id,
+            'max_players': self.max_players,
+            'players': self.players,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'data': self.data
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild a room from to_snapshot() output; players are marked restored until they reconnect"""
+        room = cls(snapshot['room_id'], snapshot.get('max_players', 2))
+        room.status = snapshot.get('status', 'waiting')
+        room.data = snapshot.get('data', {})
+        try:
+            room.created_at = datetime.fromisoformat(snapshot['created_at'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        
+        for player_id, player in snapshot.get('players', {}).items():
+            room.players[player_id] = dict(player, restored=True)
+        
+        return room
 
 
 class WebSocketRoomManager:
     """
-    Manages multiple WebSocket rooms for a page/namespace
+    Manages multiple WebSocket rooms for a page/namespace.
+    
+    Pass `page_slug` to enable snapshots of rooms/players to the page's database
+    collection, so a restarted server can warm-restart with the same rooms.
     """
     
-    def __init__(self):
+    def __init__(self, page_slug=None, snapshot_collection='room_snapshots'):
         self.rooms = {}
+        self.page_slug = page_slug
+        self.snapshot_collection = snapshot_collection
+        self.restored_at = None
     
     def create_room(self, room_id=None, max_players=2):
         """Create a new room"""
@@ -116,17 +168,169 @@ class WebSocketRoomManager:
             'active_rooms': len([r for r in self.rooms.values() if r.status == 'active']),
             'total_players': sum(len(r.players) for r in self.rooms.values())
         }
+    
+    def save_snapshot(self):
+        """Persist all rooms to the database (no-op without a page_slug)"""
+        if not self.page_slug:
+            return False
+        
+        return get_db().set_page_data(self.page_slug, self.snapshot_collection, {
+            'saved_at': datetime.now().isoformat(),
+            'rooms': [room.to_snapshot() for room in self.rooms.values()]
+        })
+    
+    def restore_snapshot(self, max_age_seconds=600):
+        """
+        Warm restart: recreate rooms from the last snapshot if it is recent enough.
+        Restored players keep their slots until they reconnect or prune_unclaimed() runs.
+        Returns the number of rooms restored.
+        """
+        if not self.page_slug:
+            return 0
+        
+        snapshot = get_db().get_page_data(self.page_slug, self.snapshot_collection)
+        if not snapshot or not snapshot.get('rooms'):
+            return 0
+        
+        try:
+            age = (datetime.now() - datetime.fromisoformat(snapshot['saved_at'])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return 0
+        if age > max_age_seconds:
+            return 0
+        
+        for room_snapshot in snapshot['rooms']:
+            room = WebSocketRoom.from_snapshot(room_snapshot)
+            self.rooms[room.room_id] = room
+        
+        self.restored_at = time.monotonic()
+        return len(snapshot['rooms'])
+    
+    def prune_unclaimed(self):
+        """Remove restored players that never reconnected, then empty rooms. Returns players removed."""
+        removed = 0
+        for room in self.rooms.values():
+            unclaimed = [pid for pid in room.players if room.is_restored_player(pid)]
+            for player_id in unclaimed:
+                room.remove_player(player_id)
+            removed += len(unclaimed)
+        
+        self.cleanup_empty_rooms()
+        return removed
+
+
+class StaggeredResync:
+    """
+    Spreads expensive per-client resyncs (e.g. sending full state) over time after a
+    warm restart, so reconnecting clients don't all get served at the same instant.
+    Outside the warm-restart window callbacks run immediately.
+    """
+    
+    def __init__(self, socketio, interval=0.1, window_seconds=30):
+        self.socketio = socketio
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.active_until = 0
+        self._next_slot = 0
+        self._lock = threading.Lock()
+    
+    def begin(self):
+        """Start a warm-restart window (call after restoring rooms)"""
+        self.active_until = time.monotonic() + self.window_seconds
+    
+    def is_active(self):
+        """Check whether resyncs are currently being staggered"""
+        return time.monotonic() < self.active_until
+    
+    def schedule(self, callback, *args):
+        """Run callback now, or in the next free slot during a warm restart. Returns the delay used."""
+        if not self.is_active():
+            callback(*args)
+            return 0
+        
+        with self._lock:
+            now = time.monotonic()
+            self._next_slot = max(now, self._next_slot) + self.interval
+            delay = self._next_slot - now
+        
+        def run_later():
+            self.socketio.sleep(delay)
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Staggered resync failed: {e}")
+        
+        self.socketio.start_background_task(run_later)
+        return delay
+
+
+# Envelope modes for responses built by websocket_success_response / websocket_error_handler
+ENVELOPE_FULL = 'full'    # success/message/data plus an ISO timestamp
+ENVELOPE_LIGHT = 'light'  # success/data plus an integer millisecond timestamp, message only if non-default
+
+# Ack modes for websocket_ack
+ACK_EMIT = 'emit'          # emit a separate acknowledgement event
+ACK_CALLBACK = 'callback'  # return the ack so Socket.IO delivers it to the client's callback (if any)
+ACK_NONE = None            # fire-and-forget, no acknowledgement at all
+
+_MONOTONIC_START = time.monotonic()
+_handler_options = threading.local()
+
 
+def monotonic_timestamp():
+    """Milliseconds since server start as an int (cheap, never goes backwards)"""
+    return int((time.monotonic() - _MONOTONIC_START) * 1000)
 
-def websocket_error_handler(error_message, emit_to_sender=True):
+
+def _current_envelope(envelope):
+    if envelope is not None:
+        return envelope
+    return getattr(_handler_options, 'envelope', ENVELOPE_FULL)
+
+
+def websocket_envelope(envelope=ENVELOPE_LIGHT, ack=ACK_EMIT):
+    """
+    Decorator configuring the response envelope and ack mode for one handler.
+    
+    Usage:
+    @socketio.on('draw_stroke', namespace='/my-page')
+    @websocket_envelope(envelope=ENVELOPE_LIGHT, ack=ACK_CALLBACK)
+    def draw_stroke(data):
+        ...
+        return websocket_ack('stroke_acknowledged', {'stroke_id': stroke_id})
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            previous = getattr(_handler_options, 'envelope', None), getattr(_handler_options, 'ack', ACK_EMIT)
+            _handler_options.envelope = envelope
+            _handler_options.ack = ack
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                _handler_options.envelope, _handler_options.ack = previous
+        
+        return wrapper
+    
+    return decorator
+
+
+def websocket_error_handler(error_message, emit_to_sender=True, envelope=None):
     """
     Standard error handler for WebSocket events
     """
-    error_data = {
-        'error': True,
-        'message': error_message,
-        'timestamp': datetime.now().isoformat()
-    }
+    if _current_envelope(envelope) == ENVELOPE_LIGHT:
+        error_data = {
+            'error': True,
+            'message': error_message,
+            'ts': monotonic_timestamp()
+        }
+    else:
+        error_data = {
+            'error': True,
+            'message': error_message,
+            'timestamp': datetime.now().isoformat()
+        }
     
     if emit_to_sender:
         emit('error', error_data)
@@ -134,10 +338,20 @@ def websocket_error_handler(error_message, emit_to_sender=True):
     return error_data
 
 
-def websocket_success_response(data, message="Success"):
+def websocket_success_response(data, message="Success", envelope=None):
     """
     Standard success response for WebSocket events
     """
+    if _current_envelope(envelope) == ENVELOPE_LIGHT:
+        response = {
+            'success': True,
+            'data': data,
+            'ts': monotonic_timestamp()
+        }
+        if message != "Success":
+            response['message'] = message
+        return response
+    
     return {
         'success': True,
         'message': message,
@@ -146,6 +360,24 @@ def websocket_success_response(data, message="Success"):
     }
 
 
+def websocket_ack(event, data, message="Success"):
+    """
+    Acknowledge a handler according to its configured ack mode.
+    Handlers should return the result: it is the callback ack in ACK_CALLBACK mode and None otherwise.
+    """
+    ack = getattr(_handler_options, 'ack', ACK_EMIT)
+    
+    if ack == ACK_NONE:
+        return None
+    
+    response = websocket_success_response(data, message)
+    if ack == ACK_CALLBACK:
+        return response
+    
+    emit(event, response)
+    return None
+
+
 def broadcast_to_room(room_id, event, data, include_sender=True, namespace=None):
     """
     Helper function to broadcast to all players in a room
@@ -153,94 +385,592 @@ def broadcast_to_room(room_id, event, data, include_sender=True, namespace=None)
     emit(event, data, room=room_id, include_self=include_sender, namespace=namespace)
 
 
+class WebSocketSchema:
+    """
+    Declarative payload schema, compiled once into per-field checks.
+    
+    Usage:
+    STROKE_SCHEMA = WebSocketSchema({
+        'player_id': {'type': str, 'max_length': 64},
+        'stroke': {'type': dict, 'allow_extra': False, 'same_length': ('x', 'y'), 'schema': {
+            'x': {'type': list, 'max_items': 2000, 'item_type': (int, float)},
+            'y': {'type': list, 'max_items': 2000, 'item_type': (int, float)},
+            'color': {'type': str, 'allowed': ('black', 'white', 'red')},
+            'id': {'type': str, 'max_length': 64, 'required': False}
+        }}
+    })
+    valid, message = STROKE_SCHEMA.validate(data)
+    
+    Field options: type, required (default True), min_length/max_length, min_items/max_items,
+    item_type, allowed, min/max, and for dicts a nested schema with allow_extra / same_length.
+    """
+    
+    def __init__(self, fields, allow_extra=True, same_length=None):
+        self.fields = frozenset(fields)
+        self.allow_extra = allow_extra
+        self.same_length = tuple(same_length or ())
+        self._required = tuple(name for name, spec in fields.items() if spec.get('required', True))
+        self._checks = tuple(
+            (name, checks) for name, checks in
+            ((name, self._compile_field(spec)) for name, spec in fields.items())
+            if checks
+        )
+    
+    @staticmethod
+    def _compile_field(spec):
+        """Turn a field spec into a tuple of check(value, path) -> error message or None"""
+        checks = []
+        
+        expected = spec.get('type')
+        if expected is not None:
+            expected_types = expected if isinstance(expected, tuple) else (expected,)
+            reject_bool = bool not in expected_types and any(t in (int, float) for t in expected_types)
+            type_label = ' or '.join(t.__name__ for t in expected_types)
+            
+            def check_type(value, path):
+                if not isinstance(value, expected_types) or (reject_bool and isinstance(value, bool)):
+                    return f"{path} must be {type_label}"
+            checks.append(check_type)
+        
+        for low_key, high_key, unit in (('min_length', 'max_length', 'characters'), ('min_items', 'max_items', 'items')):
+            low, high = spec.get(low_key), spec.get(high_key)
+            if low is not None or high is not None:
+                def check_size(value, path, low=low, high=high, unit=unit):
+                    size = len(value)
+                    if high is not None and size > high:
+                        return f"{path} is too long (max {high} {unit})"
+                    if low is not None and size < low:
+                        return f"{path} is too short (min {low} {unit})"
+                checks.append(check_size)
+        
+        item_type = spec.get('item_type')
+        if item_type is not None:
+            # Exact type membership is much cheaper than isinstance per item (and excludes bools)
+            item_type = item_type if isinstance(item_type, tuple) else (item_type,)
+            item_types = frozenset(item_type)
+            item_label = ' or '.join(t.__name__ for t in item_type)
+            
+            def check_items(value, path):
+                for item in value:
+                    if type(item) not in item_types:
+                        return f"{path} items must be {item_label}"
+            checks.append(check_items)
+        
+        allowed = spec.get('allowed')
+        if allowed is not None:
+            allowed_set = frozenset(allowed)
+            allowed_label = ', '.join(str(a) for a in allowed)
+            
+            def check_allowed(value, path):
+                if value not in allowed_set:
+                    return f"{path} must be one of: {allowed_label}"
+            checks.append(check_allowed)
+        
+        minimum, maximum = spec.get('min'), spec.get('max')
+        if minimum is not None or maximum is not None:
+            def check_range(value, path):
+                if minimum is not None and value < minimum:
+                    return f"{path} must be at least {minimum}"
+                if maximum is not None and value > maximum:
+                    return f"{path} must be at most {maximum}"
+            checks.append(check_range)
+        
+        nested = spec.get('schema')
+        if nested is not None:
+            nested_schema = WebSocketSchema(
+                nested,
+                allow_extra=spec.get('allow_extra', True),
+                same_length=spec.get('same_length')
+            )
+            
+            def check_nested(value, path):
+                valid, message = nested_schema._validate(value, path + '.')
+                if not valid:
+                    return message
+            checks.append(check_nested)
+        
+        return tuple(checks)
+    
+    def validate(self, data):
+        """Validate a payload, returning (valid, message) like validate_websocket_data"""
+        if not data:
+            return False, "No data provided"
+        if not isinstance(data, dict):
+            return False, "Invalid data format"
+        return self._validate(data, '')
+    
+    def _validate(self, data, prefix):
+        missing = [prefix + name for name in self._required if name not in data]
+        if missing:
+            return False, f"Missing required fields: {', '.join(missing)}"
+        
+        if not self.allow_extra:
+            for name in data:
+                if name not in self.fields:
+                    return False, f"Unexpected field: {prefix}{name}"
+        
+        for name, checks in self._checks:
+            if name in data:
+                value = data[name]
+                for check in checks:
+                    error = check(value, prefix + name)
+                    if error:
+                        return False, error
+        
+        if self.same_length:
+            lengths = {len(data[name]) for name in self.same_length if name in data}
+            if len(lengths) > 1:
+                return False, f"{', '.join(prefix + name for name in self.same_length)} must have the same length"
+        
+        return True, "Valid"
+
+
+def validate_payload(schema):
+    """
+    Decorator validating a handler's payload against a WebSocketSchema before it runs.
+    Invalid payloads get the standard error response and the handler is skipped.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(data=None, *args, **kwargs):
+            valid, message = schema.validate(data)
+            if not valid:
+                return websocket_error_handler(message)
+            return handler(data, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+# validate_websocket_data compiles each distinct required-fields list once
+_required_field_schemas = {}
+
+
 def validate_websocket_data(data, required_fields):
     """
     Validate incoming WebSocket data
     """
+    key = tuple(required_fields)
+    schema = _required_field_schemas.get(key)
+    if schema is None:
+        schema = _required_field_schemas[key] = WebSocketSchema({field: {} for field in key})
+    
     if not data:
         return False, "No data provided"
     
-    missing_fields = []
-    for field in required_fields:
-        if field not in data:
-            missing_fields.append(field)
+    return schema._validate(data, '')
+
+
+class TokenBucket:
+    """
+    Token bucket allowing bursts of up to `capacity` events, refilled at `rate` tokens per second
+    """
     
-    if missing_fields:
-        return False, f"Missing required fields: {', '.join(missing_fields)}"
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at', 'throttled')
     
-    return True, "Valid"
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.throttled = False
+    
+    def consume(self, tokens=1):
+        """Take tokens from the bucket, returning False if not enough are available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            self.throttled = False
+            return True
+        return False
 
 
-class P2PConnectionHelper:
+class WebSocketRateLimiter:
     """
-    Helper class for WebRTC P2P connection setup
+    Per-client (sid) and per-event token bucket rate limiter
     """
     
-    @staticmethod
-    def handle_webrtc_offer(room_manager, room_id, sender_id, offer_data):
+    def __init__(self, rate=10, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.buckets = {}  # sid -> {event: TokenBucket}
+        self.rejected = 0
+        self._lock = threading.Lock()
+    
+    def allow(self, sid, event):
         """
-        Handle WebRTC offer from a peer
+        Check whether `sid` may send `event` now.
+        Returns (allowed, first_rejection) so callers only notify once per throttled burst.
         """
-        room = room_manager.get_room(room_id)
-        if not room:
-            return websocket_error_handler("Room not found")
+        with self._lock:
+            client_buckets = self.buckets.setdefault(sid, {})
+            bucket = client_buckets.get(event)
+            if bucket is None:
+                bucket = client_buckets[event] = TokenBucket(self.rate, self.burst)
+            
+            if bucket.consume():
+                return True, False
+            
+            self.rejected += 1
+            first_rejection = not bucket.throttled
+            bucket.throttled = True
+            return False, first_rejection
+    
+    def forget(self, sid):
+        """Drop all buckets for a client (call on disconnect)"""
+        with self._lock:
+            self.buckets.pop(sid, None)
+    
+    def get_stats(self):
+        """Get rate limiter statistics"""
+        return {
+            'tracked_clients': len(self.buckets),
+            'rejected_events': self.rejected
+        }
+
+
+def rate_limited(rate=10, burst=None, event=None, limiter=None):
+    """
+    Decorator limiting how often each client may trigger a WebSocket handler.
+    
+    Usage:
+    @socketio.on('draw_stroke', namespace='/my-page')
+    @rate_limited(rate=20, burst=40)
+    def draw_stroke(data):
+        ...
+    
+    Events over the limit are dropped; the client gets one 'error' event per throttled burst.
+    Pass a shared `limiter` to call `limiter.forget(request.sid)` on disconnect.
+    """
+    def decorator(handler):
+        event_name = event or handler.__name__
+        handler_limiter = limiter or WebSocketRateLimiter(rate, burst)
         
-        if sender_id not in room.players:
-            return websocket_error_handler("Player not in room")
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            allowed, first_rejection = handler_limiter.allow(request.sid, event_name)
+            if not allowed:
+                return websocket_error_handler(
+                    f"Rate limit exceeded for {event_name}",
+                    emit_to_sender=first_rejection
+                )
+            return handler(*args, **kwargs)
+        
+        wrapper.rate_limiter = handler_limiter
+        return wrapper
+    
+    return decorator
+
+
+class OutboundQueue:
+    """
+    Bounded per-client outbound message queue for a namespace, paced by client acks.
+    
+    Each client has at most one batch in flight: its queued messages go out together as
+    one `batch_event` ({'messages': [[event, data], ...]}) and the next batch is sent when
+    the client acknowledges the previous one, so a client that falls behind is measured by
+    its own acks rather than a timer. Messages enqueued with a `coalesce_key` replace any
+    pending message with the same key (useful for state updates like player counts). When
+    a client has more than `max_pending` messages waiting, the oldest are dropped and
+    `overflow_event` (if set) leads its next batch so the client can resync instead of
+    replaying a backlog. A batch not acked within `ack_timeout` seconds counts as lost.
+    """
+    
+    def __init__(self, socketio, namespace=None, max_pending=100, overflow_event=None,
+                 batch_event='outbound_batch', ack_timeout=10):
+        self.socketio = socketio
+        self.namespace = namespace
+        self.max_pending = max_pending
+        self.overflow_event = overflow_event
+        self.batch_event = batch_event
+        self.ack_timeout = ack_timeout
+        self.pending = {}  # sid -> OrderedDict(key -> (event, data))
+        self.in_flight = {}  # sid -> (batch id, monotonic send time) of the unacked batch
+        self.overflowed = set()
+        self.dropped = 0
+        self.coalesced = 0
+        self.timed_out = 0
+        self._sequence = itertools.count()
+        self._batch_ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def enqueue(self, sid, event, data, coalesce_key=None):
+        """Queue a message for a single client"""
+        self.enqueue_many([sid], event, data, coalesce_key)
+    
+    def enqueue_many(self, sids, event, data, coalesce_key=None, skip_sid=None):
+        """Queue the same message for several clients (e.g. everyone in a room)"""
+        now = time.monotonic()
+        batches = []
+        with self._lock:
+            for sid in sids:
+                if sid == skip_sid:
+                    continue
+                self._enqueue_locked(sid, event, data, coalesce_key)
+                batch = self._take_batch_locked(sid, now)
+                if batch is not None:
+                    batches.append(batch)
+        self._send(batches)
+    
+    def _enqueue_locked(self, sid, event, data, coalesce_key):
+        queue = self.pending.get(sid)
+        if queue is None:
+            queue = self.pending[sid] = OrderedDict()
         
-        # Forward offer to other players in the room
-        for player_id in room.players:
-            if player_id != sender_id:
-                emit('webrtc_offer', {
-                    'from': sender_id,
-                    'offer': offer_data
-                }, room=player_id)
+        if coalesce_key is not None:
+            key = ('coalesce', event, coalesce_key)
+            if key in queue:
+                self.coalesced += 1
+                queue.move_to_end(key)
+        else:
+            key = next(self._sequence)
+        queue[key] = (event, data)
         
-        return websocket_success_response({}, "Offer forwarded")
+        while len(queue) > self.max_pending:
+            queue.popitem(last=False)
+            self.dropped += 1
+            self.overflowed.add(sid)
     
-    @staticmethod
-    def handle_webrtc_answer(room_manager, room_id, sender_id, answer_data):
+    def _take_batch_locked(self, sid, now):
+        """Claim a client's queued messages as its next batch, unless one is still in flight"""
+        in_flight = self.in_flight.get(sid)
+        if in_flight is not None:
+            if now - in_flight[1] < self.ack_timeout:
+                return None
+            self.timed_out += 1
+            del self.in_flight[sid]
+        
+        queue = self.pending.pop(sid, None)
+        if not queue:
+            return None
+        
+        messages = [[event, data] for event, data in queue.values()]
+        if sid in self.overflowed:
+            self.overflowed.discard(sid)
+            if self.overflow_event:
+                messages.insert(0, [self.overflow_event, {
+                    'dropped': True,
+                    'reason': 'Client fell behind, please resync'
+                }])
+        batch_id = next(self._batch_ids)
+        self.in_flight[sid] = (batch_id, now)
+        return sid, batch_id, messages
+    
+    def _send(self, batches):
+        for sid, batch_id, messages in batches:
+            self.socketio.emit(self.batch_event, {'messages': messages}, to=sid, namespace=self.namespace,
+                               callback=lambda *args, sid=sid, batch_id=batch_id: self.acknowledge(sid, batch_id))
+    
+    def acknowledge(self, sid, batch_id):
+        """A client confirmed a batch: send whatever queued up for it meanwhile"""
+        with self._lock:
+            in_flight = self.in_flight.get(sid)
+            if in_flight is None or in_flight[0] != batch_id:
+                return  # a batch that already timed out, or a forgotten client
+            del self.in_flight[sid]
+            batch = self._take_batch_locked(sid, time.monotonic())
+        self._send([batch] if batch is not None else [])
+    
+    def flush(self):
+        """Send a batch to every client with queued messages and nothing in flight (or a timed out batch)"""
+        now = time.monotonic()
+        with self._lock:
+            batches = [self._take_batch_locked(sid, now) for sid in list(self.pending)]
+        batches = [batch for batch in batches if batch is not None]
+        self._send(batches)
+        return sum(len(messages) for _, _, messages in batches)
+    
+    def forget(self, sid):
+        """Discard pending messages for a client (call on disconnect)"""
+        with self._lock:
+            self.pending.pop(sid, None)
+            self.in_flight.pop(sid, None)
+            self.overflowed.discard(sid)
+    
+    def get_stats(self):
+        """Get outbound queue statistics"""
+        with self._lock:
+            return {
+                'clients_pending': len(self.pending),
+                'messages_pending': sum(len(q) for q in self.pending.values()),
+                'batches_in_flight': len(self.in_flight),
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'timed_out': self.timed_out
+            }
+
+
+class SignalingRelay:
+    """
+    Relays WebRTC signaling between peers of a room.
+    
+    Targeted messages (offer/answer/candidates for one peer, as needed for mesh rooms)
+    go straight to that peer's Socket.IO sid; untargeted ones are a single room emit
+    that excludes the sender. With a `socketio` instance, trickle-ICE candidates are
+    batched per sender/target for `ice_batch_window` seconds and delivered as one
+    'ice_candidates' event.
+    """
+    
+    def __init__(self, room_manager, socketio=None, namespace=None, ice_batch_window=0.05):
+        self.room_manager = room_manager
+        self.socketio = socketio
+        self.namespace = namespace
+        self.ice_batch_window = ice_batch_window
+        self._pending_candidates = {}  # (room_id, sender_id, target_id) -> {'sid': ..., 'candidates': [...]}
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+    
+    def join_peer(self, room_id, peer_id):
         """
-        Handle WebRTC answer from a peer
+        Record the calling client's sid for `peer_id` and join the Socket.IO room.
+        Call from the handler where the peer joins the room.
         """
-        room = room_manager.get_room(room_id)
+        room = self.room_manager.get_room(room_id)
+        if not room or peer_id not in room.players:
+            return False
+        
+        room.players[peer_id]['data']['sid'] = request.sid
+        join_room(room_id)
+        return True
+    
+    def get_mesh_peers(self, room_id, peer_id):
+        """Other peers in the room - a joining peer sends a targeted offer to each"""
+        room = self.room_manager.get_room(room_id)
+        if not room:
+            return []
+        return [pid for pid in room.players if pid != peer_id]
+    
+    def _check_sender(self, room_id, sender_id):
+        room = self.room_manager.get_room(room_id)
         if not room:
-            return websocket_error_handler("Room not found")
+            return None, websocket_error_handler("Room not found")
         
         if sender_id not in room.players:
-            return websocket_error_handler("Player not in room")
+            return None, websocket_error_handler("Player not in room")
         
-        # Forward answer to other players in the room
-        for player_id in room.players:
-            if player_id != sender_id:
-                emit('webrtc_answer', {
-                    'from': sender_id,
-                    'answer': answer_data
-                }, room=player_id)
+        return room, None
+    
+    def _target_sid(self, room, target_id):
+        player = room.players.get(target_id)
+        if not player:
+            return None
+        return player['data'].get('sid')
+    
+    def relay(self, room_id, sender_id, event, payload_key, payload, target_id=None):
+        """Forward a signaling message to one peer (target_id) or everyone else in the room"""
+        room, error = self._check_sender(room_id, sender_id)
+        if error:
+            return error
+        
+        message = {'from': sender_id, payload_key: payload}
         
-        return websocket_success_response({}, "Answer forwarded")
+        if target_id is not None:
+            target_sid = self._target_sid(room, target_id)
+            if not target_sid:
+                return websocket_error_handler("Target peer not connected")
+            message['to'] = target_id
+            emit(event, message, to=target_sid, namespace=self.namespace)
+        else:
+            emit(event, message, room=room_id, include_self=False, namespace=self.namespace)
+        
+        return websocket_success_response({}, f"{event} forwarded")
     
-    @staticmethod
-    def handle_ice_candidate(room_manager, room_id, sender_id, candidate_data):
+    def relay_offer(self, room_id, sender_id, offer_data, target_id=None):
+        """Forward a WebRTC offer"""
+        return self.relay(room_id, sender_id, 'webrtc_offer', 'offer', offer_data, target_id)
+    
+    def relay_answer(self, room_id, sender_id, answer_data, target_id=None):
+        """Forward a WebRTC answer"""
+        return self.relay(room_id, sender_id, 'webrtc_answer', 'answer', answer_data, target_id)
+    
+    def relay_ice_candidate(self, room_id, sender_id, candidate_data, target_id=None):
         """
-        Handle ICE candidate from a peer
+        Forward a trickle-ICE candidate. Batched into 'ice_candidates' events when a
+        socketio instance is available, otherwise sent immediately as 'ice_candidate'.
         """
-        room = room_manager.get_room(room_id)
-        if not room:
-            return websocket_error_handler("Room not found")
+        if self.socketio is None:
+            return self.relay(room_id, sender_id, 'ice_candidate', 'candidate', candidate_data, target_id)
         
-        if sender_id not in room.players:
-            return websocket_error_handler("Player not in room")
+        room, error = self._check_sender(room_id, sender_id)
+        if error:
+            return error
+        
+        if target_id is not None and not self._target_sid(room, target_id):
+            return websocket_error_handler("Target peer not connected")
+        
+        key = (room_id, sender_id, target_id)
+        with self._lock:
+            batch = self._pending_candidates.get(key)
+            if batch is None:
+                batch = self._pending_candidates[key] = {'sid': request.sid, 'candidates': []}
+            batch['candidates'].append(candidate_data)
+            
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
         
-        # Forward ICE candidate to other players in the room
-        for player_id in room.players:
-            if player_id != sender_id:
-                emit('ice_candidate', {
-                    'from': sender_id,
-                    'candidate': candidate_data
-                }, room=player_id)
+        if schedule:
+            self.socketio.start_background_task(self._flush_later)
         
-        return websocket_success_response({}, "ICE candidate forwarded")
+        return websocket_success_response({}, "ICE candidate queued")
+    
+    def _flush_later(self):
+        self.socketio.sleep(self.ice_batch_window)
+        self.flush_ice_candidates()
+    
+    def flush_ice_candidates(self):
+        """Deliver all batched ICE candidates, one event per sender/target pair"""
+        with self._lock:
+            pending, self._pending_candidates = self._pending_candidates, {}
+            self._flush_scheduled = False
+        
+        for (room_id, sender_id, target_id), batch in pending.items():
+            message = {'from': sender_id, 'candidates': batch['candidates']}
+            
+            if target_id is not None:
+                room = self.room_manager.get_room(room_id)
+                target_sid = self._target_sid(room, target_id) if room else None
+                if not target_sid:
+                    continue
+                message['to'] = target_id
+                self.socketio.emit('ice_candidates', message, to=target_sid, namespace=self.namespace)
+            else:
+                self.socketio.emit('ice_candidates', message, room=room_id,
+                                   skip_sid=batch['sid'], namespace=self.namespace)
+        
+        return len(pending)
+
+
+class P2PConnectionHelper:
+    """
+    Helper class for WebRTC P2P connection setup.
+    Thin wrappers around SignalingRelay: one room emit excluding the sender, or a
+    direct send when target_id is given. Peers must have joined the Socket.IO room.
+    """
+    
+    @staticmethod
+    def handle_webrtc_offer(room_manager, room_id, sender_id, offer_data, target_id=None):
+        """
+        Handle WebRTC offer from a peer
+        """
+        return SignalingRelay(room_manager).relay_offer(room_id, sender_id, offer_data, target_id)
+    
+    @staticmethod
+    def handle_webrtc_answer(room_manager, room_id, sender_id, answer_data, target_id=None):
+        """
+        Handle WebRTC answer from a peer
+        """
+        return SignalingRelay(room_manager).relay_answer(room_id, sender_id, answer_data, target_id)
+    
+    @staticmethod
+    def handle_ice_candidate(room_manager, room_id, sender_id, candidate_data, target_id=None):
+        """
+        Handle ICE candidate from a peer
+        """
+        return SignalingRelay(room_manager).relay_ice_candidate(room_id, sender_id, candidate_data, target_id)
 
 
 # Example usage patterns for common WebSocket scenarios
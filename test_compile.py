@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental build in compile.py.
+Run from the repository root: python3 -m pytest test_compile.py
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from compile import ModularBlogCompiler
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+
+def write_page(pages_dir, slug, title):
+    """Create a minimal page directory with a config and some content"""
+    page_dir = pages_dir / slug
+    page_dir.mkdir(parents=True)
+    config = {
+        'title': title,
+        'slug': slug,
+        'date': '2025-01-01',
+        'description': f"{title} description",
+        'categories': ['testing']
+    }
+    (page_dir / "config.json").write_text(json.dumps(config), encoding='utf-8')
+    content = f"<style>\nh1 {{ color: #333; }}\n</style>\n\n<html>\n<h1>{title}</h1>\n<p>Some content.</p>\n</html>\n"
+    (page_dir / "content.md").write_text(content, encoding='utf-8')
+    return page_dir
+
+
+class IncrementalBuildTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.pages_dir = self.tmp / "pages"
+        self.output_dir = self.tmp / "output"
+        write_page(self.pages_dir, "kept", "Kept Page")
+        self.removed_dir = write_page(self.pages_dir, "removed", "Removed Page")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def build(self, **options):
+        compiler = ModularBlogCompiler(self.pages_dir, self.output_dir,
+                                       templates_dir=TEMPLATES_DIR, **options)
+        compiler.compile_all()
+        return compiler
+
+    def test_removed_page_is_cleaned_up_when_minify_changes(self):
+        self.build()
+        self.assertTrue((self.output_dir / "removed" / "index.html").exists())
+
+        # The manifest can't be reused for skipping, but still lists what to delete
+        shutil.rmtree(self.removed_dir)
+        compiler = self.build(minify=True)
+
+        self.assertEqual(compiler.build_stats['removed'], ['removed'])
+        self.assertEqual(compiler.build_stats['compiled'], ['kept'])
+        self.assertFalse((self.output_dir / "removed").exists())
+        self.assertTrue((self.output_dir / "kept" / "index.html").exists())
+
+        compiler = self.build()
+        self.assertEqual(compiler.build_stats['removed'], [])
+        self.assertFalse((self.output_dir / "removed").exists())
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        compiler = self.build()
+        self.assertEqual(compiler.build_stats['compiled'], [])
+        self.assertEqual(sorted(compiler.build_stats['skipped']), ['kept', 'removed'])
+
+
+if __name__ == "__main__":
+    unittest.main()